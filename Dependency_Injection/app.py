@@ -1,26 +1,54 @@
 # 🍽️ main.py
 # A simple FastAPI project that demonstrates Dependency Injection through a Royal Kitchen story
 
-from fastapi import FastAPI, Depends
+import asyncio
+import inspect
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, List, Tuple
 
-app = FastAPI()
+from fastapi import FastAPI, Depends
 
 
 # 🔧 STEP 1: Define Ingredients (These are the "Dependencies")
 # These are things that other parts of your app might need.
 # Think of them as tools or services you can inject into classes or functions.
+# In a real service they are expensive clients (HTTP, database, ...): getting
+# one ready takes a while, so they are created with an async `create()`.
+# Set INGREDIENT_PREP_SECONDS to simulate that cost (benchmark.py does).
+
+INGREDIENT_PREP_SECONDS = float(os.environ.get("INGREDIENT_PREP_SECONDS", 0))
+
 
 # TomatoSauce is an ingredient used by ItalianChef
 class TomatoSauce:
+    @classmethod
+    async def create(cls) -> "TomatoSauce":
+        await asyncio.sleep(INGREDIENT_PREP_SECONDS)  # Simmering takes time
+        return cls()
+
     def flavor(self):
         return "Tangy and fresh tomato sauce"
 
+    async def close(self):
+        pass
+
 
 # MasalaMix is an ingredient used by IndianChef
 class MasalaMix:
+    @classmethod
+    async def create(cls) -> "MasalaMix":
+        await asyncio.sleep(INGREDIENT_PREP_SECONDS)  # Roasting and grinding
+        return cls()
+
     def flavor(self):
         return "Spicy and aromatic Indian masala"
 
+    async def close(self):
+        pass
+
 
 # 👨‍🍳 STEP 2: Define Chefs (These are the "Services" that depend on ingredients)
 # These chefs require specific ingredients to cook their dishes.
@@ -44,35 +72,216 @@ class IndianChef:
         return f"Butter Chicken with {self.masala.flavor()}"
 
 
-# 📦 STEP 3: Create Dependency Provider Functions
-# These functions tell FastAPI how to provide the dependencies when needed.
-# This is where injection happens in FastAPI routes.
+# 🗄️ STEP 3: The Pantry (a provider registry)
+# Each dependency is registered once with a lifetime:
+# - SINGLETON: made on first use, shared by every request, closed at shutdown
+# - REQUEST:   made once per request (however many endpoints/deps ask), closed after it
+# - POOLED:    borrowed from a bounded pool for the request, then handed back
+# Nothing is made at import time: creation is lazy and async.
+
+class Lifetime(str, Enum):
+    SINGLETON = "singleton"
+    REQUEST = "request"
+    POOLED = "pooled"
+
+
+@dataclass
+class Provider:
+    factory: Callable  # Sync or async; receives the instances listed in `requires`
+    lifetime: Lifetime
+    requires: Tuple[str, ...] = ()
+    pool_size: int = 4
+
+
+async def build(factory: Callable, *args) -> Any:
+    instance = factory(*args)
+    return await instance if inspect.isawaitable(instance) else instance
+
+
+async def dispose(instance: Any):
+    close = getattr(instance, "close", None)
+    if close is not None:
+        result = close()
+        if inspect.isawaitable(result):
+            await result
+
+
+class ResourcePool:
+    """
+    Up to `size` instances, made on demand. When all are in use,
+    acquire() waits for one to be released instead of making more.
+    `slots` counts instances handed out: a caller holding a slot takes an
+    idle instance or, if there is none, builds one. If building fails the
+    slot is given back, so the next waiter gets to try instead of waiting
+    for an instance that will never come.
+    """
+
+    def __init__(self, factory: Callable, size: int):
+        self.factory = factory
+        self.size = size
+        self.created = 0
+        self.slots = asyncio.Semaphore(size)
+        self.idle: List[Any] = []
+        self.instances = []
+
+    async def acquire(self, *args) -> Any:
+        await self.slots.acquire()
+        if self.idle:
+            return self.idle.pop()
+        try:
+            instance = await build(self.factory, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        self.created += 1
+        self.instances.append(instance)
+        return instance
+
+    def release(self, instance: Any):
+        self.idle.append(instance)
+        self.slots.release()
+
+    async def close(self):
+        for instance in self.instances:
+            await dispose(instance)
+        self.instances.clear()
+        self.created = 0
+        self.idle.clear()
+        self.slots = asyncio.Semaphore(self.size)  # Do not carry waiters over to the next event loop
+
+
+class Pantry:
+    def __init__(self):
+        self.providers: Dict[str, Provider] = {}
+        self.singletons: Dict[str, Any] = {}
+        self.singleton_locks: Dict[str, asyncio.Lock] = {}
+        self.pools: Dict[str, ResourcePool] = {}
+
+    def register(self, name: str, factory: Callable, lifetime: Lifetime, requires: Tuple[str, ...] = (), pool_size: int = 4):
+        if lifetime is not Lifetime.REQUEST:
+            for required in requires:
+                if self.providers[required].lifetime is not Lifetime.SINGLETON:
+                    raise ValueError(f"{name} outlives a request, so it may only require singletons (not {required})")
+        self.providers[name] = Provider(factory, lifetime, requires, pool_size)
+        if lifetime is Lifetime.POOLED:
+            self.pools[name] = ResourcePool(factory, pool_size)
+
+    async def singleton(self, name: str) -> Any:
+        instance = self.singletons.get(name)
+        if instance is not None:
+            return instance  # The hot path: one dict lookup
+        lock = self.singleton_locks.setdefault(name, asyncio.Lock())
+        async with lock:  # Concurrent first requests must not build it twice
+            if name not in self.singletons:
+                provider = self.providers[name]
+                args = [await self.singleton(required) for required in provider.requires]
+                self.singletons[name] = await build(provider.factory, *args)
+        return self.singletons[name]
+
+    async def shutdown(self):
+        for pool in self.pools.values():
+            await pool.close()
+        for instance in reversed(list(self.singletons.values())):
+            await dispose(instance)
+        self.singletons.clear()
+        self.singleton_locks.clear()
+
+
+class RequestScope:
+    """
+    What one request has taken out of the pantry. Request-lifetime
+    instances are closed and pooled ones returned when the request ends.
+    """
+
+    def __init__(self, pantry: Pantry, cleanup: AsyncExitStack):
+        self.pantry = pantry
+        self.cleanup = cleanup
+        self.instances: Dict[str, Any] = {}
+
+    async def get(self, name: str) -> Any:
+        provider = self.pantry.providers[name]
+        if provider.lifetime is Lifetime.SINGLETON:
+            return await self.pantry.singleton(name)
+        if name in self.instances:
+            return self.instances[name]
+
+        args = [await self.get(required) for required in provider.requires]
+        if provider.lifetime is Lifetime.POOLED:
+            pool = self.pantry.pools[name]
+            instance = await pool.acquire(*args)
+            self.cleanup.callback(pool.release, instance)
+        else:
+            instance = await build(provider.factory, *args)
+            self.cleanup.push_async_callback(dispose, instance)
+        self.instances[name] = instance
+        return instance
+
+
+pantry = Pantry()
+
+
+async def request_scope():
+    # FastAPI caches this per request, so all provided deps share one scope
+    async with AsyncExitStack() as cleanup:
+        yield RequestScope(pantry, cleanup)
+
+
+def provide(name: str) -> Callable:
+    """
+    A FastAPI dependency that hands out `name` from the pantry.
+    Singletons skip the request scope: they need no per-request cleanup,
+    so endpoints that only use singletons pay for no exit stack.
+    """
+    if pantry.providers[name].lifetime is Lifetime.SINGLETON:
+        async def dependency():
+            return await pantry.singleton(name)
+        return dependency
+
+    async def dependency(scope: RequestScope = Depends(request_scope)):
+        return await scope.get(name)
+    return dependency
+
+
+# 📦 STEP 4: Register Dependency Providers
+# This tells the pantry how to make each dependency and how long it lives.
+# - Tomato sauce is one big shared pot (singleton), and the Italian chef
+#   who uses it stays for the whole service.
+# - Masala is ground in a few batches that are passed around (pooled), so
+#   each Indian chef is hired for one request with a borrowed batch.
+
+pantry.register("tomato_sauce", TomatoSauce.create, Lifetime.SINGLETON)
+pantry.register("masala_mix", MasalaMix.create, Lifetime.POOLED, pool_size=int(os.environ.get("MASALA_POOL_SIZE", 4)))
+pantry.register("italian_chef", ItalianChef, Lifetime.SINGLETON, requires=("tomato_sauce",))
+pantry.register("indian_chef", IndianChef, Lifetime.REQUEST, requires=("masala_mix",))
+
+get_tomato_sauce = provide("tomato_sauce")
+get_masala_mix = provide("masala_mix")
+get_italian_chef = provide("italian_chef")
+get_indian_chef = provide("indian_chef")
+
 
-def get_tomato_sauce():
-    # Returns an instance of TomatoSauce
-    return TomatoSauce()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await pantry.shutdown()  # Close every client the kitchen opened
 
 
-def get_masala_mix():
-    # Returns an instance of MasalaMix
-    return MasalaMix()
+app = FastAPI(lifespan=lifespan)
 
 
-# 🚀 STEP 4: API Endpoints (Chefs enter the kitchen!)
+# 🚀 STEP 5: API Endpoints (Chefs enter the kitchen!)
 # Here  we use Depends() to inject dependencies at runtime,
 # which allows us to switch or mock dependencies easily.
 
 @app.get("/italian-chef")
-def italian_chef_dishes(sauce: TomatoSauce = Depends(get_tomato_sauce)):
+def italian_chef_dishes(chef: ItalianChef = Depends(get_italian_chef)):
     # Dependency injected via route parameter using Depends()
     # ↑↑↑ This is where Dependency Injection happens!
-    chef = ItalianChef(sauce=sauce)  # Passing the injected sauce to the chef
     return {"dish": chef.cook()}
 
 
 @app.get("/indian-chef")
-def indian_chef_dishes(masala: MasalaMix = Depends(get_masala_mix)):
+def indian_chef_dishes(chef: IndianChef = Depends(get_indian_chef)):
     # Dependency injected via route parameter using Depends()
     # ↑↑↑ This is where Dependency Injection happens!
-    chef = IndianChef(masala=masala)  # Passing the injected masala to the chef
     return {"dish": chef.cook()}
@@ -0,0 +1,88 @@
+# ⏱️ Royal Kitchen benchmarks
+# Run from this folder:  python benchmark.py providers
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+
+import app as kitchen
+
+
+def legacy_app() -> FastAPI:
+    """
+    The kitchen before the pantry: every request makes fresh ingredients
+    and a fresh chef.
+    """
+    legacy = FastAPI()
+
+    async def get_tomato_sauce():
+        return await kitchen.TomatoSauce.create()
+
+    async def get_masala_mix():
+        return await kitchen.MasalaMix.create()
+
+    @legacy.get("/italian-chef")
+    def italian_chef_dishes(sauce=Depends(get_tomato_sauce)):
+        return {"dish": kitchen.ItalianChef(sauce=sauce).cook()}
+
+    @legacy.get("/indian-chef")
+    def indian_chef_dishes(masala=Depends(get_masala_mix)):
+        return {"dish": kitchen.IndianChef(masala=masala).cook()}
+
+    return legacy
+
+
+async def serve(app: FastAPI, requests: int, concurrency: int) -> tuple:
+    """
+    Sends `requests` GETs (half to each chef), `concurrency` at a time.
+    Returns (requests per second, median latency in ms).
+    """
+    paths = ["/italian-chef", "/indian-chef"] * (requests // 2)
+    queue = iter(paths)
+    latencies = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://kitchen") as client:
+        async def worker():
+            for path in queue:
+                sent = time.perf_counter()
+                response = await client.get(path)
+                latencies.append((time.perf_counter() - sent) * 1e3)
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    await kitchen.pantry.shutdown()
+    return len(paths) / elapsed, statistics.median(latencies)
+
+
+def bench_providers(args):
+    """
+    Requests/s with per-request construction against the pantry
+    (singleton sauce, pooled masala), for an expensive ingredient
+    (--prep-ms) and for a free one, where only the DI overhead is left.
+    """
+    print(f"{'prep ms':>8} {'':>12} {'req/s':>8} {'p50 ms':>8}")
+    for prep_ms in (args.prep_ms, 0.0):
+        kitchen.INGREDIENT_PREP_SECONDS = prep_ms / 1000
+        for name, app in (("per-request", legacy_app()), ("pantry", kitchen.app)):
+            rate, p50 = asyncio.run(serve(app, args.requests, args.concurrency))
+            print(f"{prep_ms:>8.1f} {name:>12} {rate:>8,.0f} {p50:>8.2f}")
+
+
+BENCHMARKS = {
+    "providers": bench_providers,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Royal Kitchen benchmarks")
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--prep-ms", type=float, default=10.0)
+    args = parser.parse_args()
+    BENCHMARKS[args.name](args)
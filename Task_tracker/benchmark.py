@@ -0,0 +1,276 @@
+# ⏱️ Task Tracker benchmarks
+# Run from this folder:  python benchmark.py <user-tasks|bulk|backends|ids|validation>
+
+import argparse
+import time
+from datetime import date, timedelta
+from typing import Optional
+
+import os
+import statistics
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import main
+from storage import MemoryBackend, SQLiteBackend, StorageBackend
+
+
+def reset_db(backend: StorageBackend = None):
+    """
+    Points the app at a fresh backend (empty in-memory one by default).
+    """
+    main.db.close()
+    main.db = backend or MemoryBackend()
+
+
+def seed_tasks(total: int, users: int, chunk: int = 10_000):
+    """
+    Adds `users` users and `total` tasks spread round-robin over them.
+    Bypasses HTTP so that seeding 1M rows stays quick.
+    """
+    due = date.today() + timedelta(days=30)
+    user_ids = [main.db.add_user({"username": f"user{i}", "email": f"user{i}@example.com"})["id"] for i in range(users)]
+    for offset in range(0, total, chunk):
+        main.db.add_tasks([
+            {
+                "title": f"Task {n}",
+                "description": None,
+                "due_date": due,
+                "status": "pending",
+                "user_id": user_ids[n % users],
+            }
+            for n in range(offset, min(offset + chunk, total))
+        ])
+
+
+def list_user_tasks(user_id: int, limit: int = 100, **filters):
+    """
+    Calls the endpoint function directly with every query parameter filled in.
+    """
+    params = {"cursor": None, "status": None, "due_from": None, "due_to": None}
+    params.update(filters)
+    return main.get_tasks_for_user(user_id, limit=limit, **params)
+
+
+def time_call(fn, repeat: int) -> float:
+    """
+    Returns the mean wall time of fn() in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def bench_user_tasks(args):
+    """
+    Per-user listing latency should stay flat while task_db grows,
+    because each user owns the same number of tasks at every size.
+    """
+    print(f"{'task_db rows':>14} {'tasks/user':>11} {'list µs':>10}")
+    for size in (10_000, 100_000, 1_000_000):
+        reset_db()
+        seed_tasks(size, size // args.tasks_per_user)
+        mean = time_call(lambda: list_user_tasks(1), args.repeat)
+        print(f"{size:>14,} {args.tasks_per_user:>11} {mean:>10.1f}")
+
+
+def bench_bulk(args):
+    """
+    Compares N single POST /tasks/ calls against one POST /tasks/bulk
+    carrying the same N tasks, through the full HTTP stack.
+    """
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)
+    due = (date.today() + timedelta(days=30)).isoformat()
+    tasks = [{"title": f"Task {i}", "due_date": due, "user_id": 1} for i in range(args.batch)]
+
+    reset_db()
+    seed_tasks(0, 1)
+    start = time.perf_counter()
+    for task in tasks:
+        client.post("/tasks/", json=task)
+    single = args.batch / (time.perf_counter() - start)
+
+    reset_db()
+    seed_tasks(0, 1)
+    start = time.perf_counter()
+    client.post("/tasks/bulk", json=tasks)
+    bulk = args.batch / (time.perf_counter() - start)
+
+    print(f"single inserts: {single:>10,.0f} tasks/s")
+    print(f"bulk insert:    {bulk:>10,.0f} tasks/s  ({bulk / single:.1f}x)")
+
+
+def bench_backends(args):
+    """
+    Runs the same mixed workload (1 insert : 2 task reads : 1 page read)
+    against each backend from several threads at once.
+    """
+    def workload(op: int) -> float:
+        start = time.perf_counter()
+        kind = op % 4
+        if kind == 0:
+            main.db.add_tasks([{"title": "t", "description": None, "due_date": due, "status": "pending", "user_id": 1 + op % 100}])
+        elif kind == 3:
+            main.db.list_user_tasks(1 + op % 100, 50)
+        else:
+            main.db.get_task(1 + op % 10_000)
+        return (time.perf_counter() - start) * 1e6
+
+    due = date.today() + timedelta(days=30)
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": MemoryBackend(),
+            "sqlite": SQLiteBackend(os.path.join(tmp, "bench.db"), pool_size=args.threads),
+        }
+        print(f"{'backend':>8} {'ops/s':>10} {'p50 µs':>8} {'p99 µs':>8}")
+        for name, backend in backends.items():
+            reset_db(backend)
+            seed_tasks(10_000, 100)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.threads) as pool:
+                latencies = sorted(pool.map(workload, range(args.ops)))
+            elapsed = time.perf_counter() - start
+            p99 = latencies[int(len(latencies) * 0.99)]
+            print(f"{name:>8} {args.ops / elapsed:>10,.0f} {statistics.median(latencies):>8.1f} {p99:>8.1f}")
+        reset_db()
+
+
+def insert_from_threads(backend: StorageBackend, threads: int, inserts: int) -> list:
+    """
+    Fires `inserts` task inserts from each of `threads` threads at once
+    (every 10th insert is a bulk of 5) and returns all assigned task IDs.
+    """
+    due = date.today() + timedelta(days=30)
+    task = {"title": "t", "description": None, "due_date": due, "status": "pending", "user_id": 1}
+
+    def worker(_):
+        ids = []
+        for n in range(inserts):
+            batch = [task] * (5 if n % 10 == 0 else 1)
+            ids.extend(stored["id"] for stored in backend.add_tasks(batch))
+        return ids
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return [task_id for ids in pool.map(worker, range(threads)) for task_id in ids]
+
+
+def insert_from_process(path: str, threads: int, inserts: int) -> list:
+    backend = SQLiteBackend(path, pool_size=threads, id_block_size=100)
+    try:
+        return insert_from_threads(backend, threads, inserts)
+    finally:
+        backend.close()
+
+
+def bench_ids(args):
+    """
+    Stress test for ID allocation: concurrent inserts from many threads,
+    and for SQLite from several processes sharing one database file.
+    Fails loudly if any task ID is handed out twice.
+    """
+    from multiprocessing import Pool
+
+    expected = args.threads * args.inserts * 14 // 10
+    backend = MemoryBackend(id_block_size=100)
+    backend.add_user({"username": "stress", "email": "stress@example.com"})
+    start = time.perf_counter()
+    ids = insert_from_threads(backend, args.threads, args.inserts)
+    elapsed = time.perf_counter() - start
+    assert len(ids) == expected and len(set(ids)) == len(ids), "duplicate task IDs (memory)"
+    assert len(backend.list_user_tasks(1, expected + 1)) == expected, "index lost tasks (memory)"
+    print(f"memory: {len(ids):,} unique IDs from {args.threads} threads ({len(ids) / elapsed:,.0f} tasks/s)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stress.db")
+        SQLiteBackend(path, pool_size=1).add_user({"username": "stress", "email": "stress@example.com"})
+        start = time.perf_counter()
+        with Pool(args.processes) as pool:
+            results = pool.starmap(insert_from_process, [(path, args.threads, args.inserts)] * args.processes)
+        elapsed = time.perf_counter() - start
+        ids = [task_id for chunk in results for task_id in chunk]
+        assert len(ids) == expected * args.processes and len(set(ids)) == len(ids), "duplicate task IDs (sqlite)"
+        print(f"sqlite: {len(ids):,} unique IDs from {args.processes} processes x {args.threads} threads "
+              f"({len(ids) / elapsed:,.0f} tasks/s)")
+
+
+def bench_validation(args):
+    """
+    Per-task cost of request validation + response serialization.
+    "before" replays the old path: v1-style @validator models, .dict(),
+    and a full TaskDetails validation of every stored row on the way out.
+    "after" is the current path in main.py.
+    """
+    import json
+    import warnings
+
+    from pydantic import BaseModel, validator
+
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+    class LegacyTaskInput(BaseModel):
+        title: str
+        description: Optional[str] = None
+        due_date: date
+        user_id: int
+
+        @validator("due_date")
+        def future_due_date(cls, value):
+            if value < date.today():
+                raise ValueError("Due date can't be in the past.")
+            return value
+
+    class LegacyTaskDetails(BaseModel):
+        id: int
+        title: str
+        description: Optional[str] = None
+        due_date: date
+        status: str
+        user_id: int
+
+        @validator("due_date")
+        def check_due_date(cls, value):
+            if value < date.today():
+                raise ValueError("Due date must be today or later.")
+            return value
+
+    body = json.dumps({"title": "Write report", "description": "Q3 numbers", "due_date": (date.today() + timedelta(days=7)).isoformat(), "user_id": 1})
+
+    def before():
+        row = LegacyTaskInput.model_validate_json(body).dict()
+        row.update(id=1, status="pending")
+        return json.dumps(LegacyTaskDetails.model_validate(row).model_dump(mode="json")).encode()
+
+    def after():
+        row = main.TaskInput.model_validate_json(body).model_dump()
+        row.update(id=1, status=main.TaskStatus.pending.value)
+        return main.task_row_adapter.dump_json(row)
+
+    for name, fn in (("before", before), ("after", after)):
+        fn()
+        print(f"{name:>7}: {time_call(fn, args.repeat * 10):.2f} µs/task")
+
+
+BENCHMARKS = {
+    "user-tasks": bench_user_tasks,
+    "bulk": bench_bulk,
+    "backends": bench_backends,
+    "ids": bench_ids,
+    "validation": bench_validation,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Task Tracker benchmarks")
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--tasks-per-user", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=20_000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--inserts", type=int, default=500)
+    args = parser.parse_args()
+    BENCHMARKS[args.name](args)
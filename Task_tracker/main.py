@@ -4,26 +4,94 @@
 # 📦 IMPORTS
 # -----------------------------
 
-from fastapi import FastAPI, HTTPException  # FastAPI framework aur error handling
-from pydantic import BaseModel, EmailStr, constr, validator  # Data validation tools
+from fastapi import FastAPI, HTTPException, Query, Request, Response  # FastAPI framework aur error handling
+from pydantic import BaseModel, EmailStr, TypeAdapter, ValidationError, constr, field_validator  # Data validation tools
 from datetime import date  # For handling task due dates
+from enum import Enum  # Fixed set of task statuses
 from typing import Optional, List  # For optional fields and lists
+from typing_extensions import TypedDict  # pydantic needs this flavour before Python 3.12
+from fastapi.concurrency import run_in_threadpool  # Keeps blocking storage calls off the event loop
+from contextlib import asynccontextmanager  # App startup/shutdown hooks
+import asyncio  # Background overdue sweeper
+import base64  # Opaque pagination cursors
+import json  # Parsing bulk upload bodies
+import os  # Reading the storage configuration
+from storage import create_backend  # Pluggable storage backends
+
+# -------------------------------
+# 🗃️ DATABASE
+# -------------------------------
+# In-memory by default (resets on restart). Set TASK_TRACKER_DB to
+# sqlite:///tasks.db to persist data and share it across uvicorn workers.
+
+db = create_backend(os.environ.get("TASK_TRACKER_DB", "memory"))
+
+OVERDUE_SWEEP_SECONDS = float(os.environ.get("TASK_TRACKER_SWEEP_SECONDS", "60"))
 
 # -------------------------------
 # 🚀 INITIALIZATION
 # -------------------------------
 
-app = FastAPI()  # Create an instance of FastAPI
+async def sweep_overdue_tasks():
+    """
+    Background loop that flags tasks as overdue once their due date passes.
+    Each sweep only visits tasks that became overdue since the last one.
+    """
+    while True:
+        await run_in_threadpool(db.mark_overdue, date.today())
+        await asyncio.sleep(OVERDUE_SWEEP_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweeper = asyncio.create_task(sweep_overdue_tasks())
+    yield
+    sweeper.cancel()
+    db.close()  # Release pooled connections on shutdown
+
+
+app = FastAPI(lifespan=lifespan)  # Create an instance of FastAPI
+
 
 # -------------------------------
-# 🗃️ IN-MEMORY DATABASE (Temporary Storage)
+# 📄 PAGINATION CURSORS
 # -------------------------------
+# A cursor is the sort key of the last task on the previous page, so the
+# next page starts with an index seek instead of skipping rows.
+# "i.<id>" pages by task ID, "d.<ordinal>.<id>" pages by (due_date, ID).
 
-user_db = {}  # Dictionary to store users
-task_db = {}  # Dictionary to store tasks
+def encode_cursor(key: tuple) -> str:
+    if len(key) == 1:
+        raw = f"i.{key[0]}"
+    else:
+        raw = f"d.{key[0].toordinal()}.{key[1]}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
 
-next_user_id = 1  # Auto-increment ID for new users
-next_task_id = 1  # Auto-increment ID for new tasks
+
+def cursor_id(text: str) -> int:
+    # Task IDs are SQLite integers; anything wider could never match a row
+    # and would overflow when bound to the query
+    value = int(text)
+    if not -2 ** 63 <= value < 2 ** 63:
+        raise ValueError("cursor id out of range")
+    return value
+
+
+def decode_cursor(cursor: str, by_due_date: bool) -> tuple:
+    """
+    Turns an opaque cursor back into a sort key.
+    Raises 400 if it is malformed or was issued for a different ordering.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        kind, *parts = raw.split(".")
+        if by_due_date and kind == "d" and len(parts) == 2:
+            return (date.fromordinal(int(parts[0])), cursor_id(parts[1]))
+        if not by_due_date and kind == "i" and len(parts) == 1:
+            return (cursor_id(parts[0]),)
+    except (ValueError, OverflowError):  # Huge ordinals overflow fromordinal
+        pass
+    raise HTTPException(status_code=400, detail="Invalid cursor")
 
 # -------------------------------
 # 📌 DATA MODELS
@@ -52,6 +120,15 @@ class UserInfo(BaseModel):
 
 # ✅ TASK MODELS
 
+class TaskStatus(str, Enum):
+    """
+    Allowed task statuses. Stored as their plain string values.
+    """
+    pending = "pending"
+    in_progress = "in_progress"
+    completed = "completed"
+
+
 class TaskInput(BaseModel):
     """
     Model used to receive input when adding a new task.
@@ -65,8 +142,9 @@ class TaskInput(BaseModel):
     due_date: date
     user_id: int
 
-    @validator("due_date")
-    def future_due_date(cls, value):
+    @field_validator("due_date")
+    @classmethod
+    def future_due_date(cls, value: date) -> date:
         if value < date.today():
             raise ValueError("Due date can't be in the past.")
         return value
@@ -75,20 +153,17 @@ class TaskInput(BaseModel):
 class TaskDetails(BaseModel):
     """
     Model used to return full task details including status and ID.
-    - Includes same due date validation.
+    - Documents the response shape; stored rows were validated on the way
+      in, so responses are serialized from them without re-validation
+      (a task must stay readable after its due date passes).
     """
     id: int
     title: str
     description: Optional[str] = None
     due_date: date
-    status: str
+    status: TaskStatus
     user_id: int
-
-    @validator("due_date")
-    def check_due_date(cls, value):
-        if value < date.today():
-            raise ValueError("Due date must be today or later.")
-        return value
+    overdue: bool = False
 
 
 class TaskStatusUpdate(BaseModel):
@@ -96,14 +171,54 @@ class TaskStatusUpdate(BaseModel):
     Model used to update task status.
     - Only allows specific values: pending, in_progress, completed.
     """
+    status: TaskStatus
+
+
+# 📤 RESPONSE SERIALIZATION
+# Stored task rows are plain dicts shaped like TaskDetails. Dumping them
+# through a TypedDict adapter writes JSON straight from the dict, skipping
+# the model validation FastAPI would run on every response_model return.
+
+class TaskRow(TypedDict):
+    id: int
+    title: str
+    description: Optional[str]
+    due_date: date
     status: str
+    user_id: int
+    overdue: bool
 
-    @validator("status")
-    def validate_status(cls, val):
-        valid_statuses = ["pending", "in_progress", "completed"]
-        if val not in valid_statuses:
-            raise ValueError(f"Invalid status. Choose from: {', '.join(valid_statuses)}")
-        return val
+
+task_row_adapter = TypeAdapter(TaskRow)
+task_rows_adapter = TypeAdapter(List[TaskRow])
+
+
+def task_json(task: dict) -> Response:
+    return Response(content=task_row_adapter.dump_json(task), media_type="application/json")
+
+
+# 📦 BULK MODELS
+
+class BulkItemError(BaseModel):
+    """
+    Validation problems for one item of a bulk upload.
+    - index is the item's position (array index or NDJSON line number, from 0).
+    """
+    index: int
+    errors: List[dict]
+
+
+class BulkTaskResult(BaseModel):
+    """
+    Outcome of a bulk upload.
+    - created holds the IDs of stored tasks, in input order and contiguous.
+    """
+    created: List[int]
+    errors: List[BulkItemError]
+
+
+task_input_adapter = TypeAdapter(TaskInput)  # Built once, reused for every bulk item
+MAX_BULK_TASKS = 10_000
 
 
 # -------------------------------
@@ -114,15 +229,10 @@ class TaskStatusUpdate(BaseModel):
 def register_user(payload: UserCreate):
     """
     Creates a new user with auto-assigned ID.
-    Adds user to in-memory database.
+    Adds user to the database.
     Returns created user info.
     """
-    global next_user_id
-    user_info = payload.dict()
-    user_info["id"] = next_user_id
-    user_db[next_user_id] = user_info
-    next_user_id += 1
-    return user_info
+    return db.add_user(payload.model_dump())
 
 
 @app.get("/users/{user_id}", response_model=UserInfo)
@@ -131,9 +241,10 @@ def fetch_user(user_id: int):
     Fetches a user by their ID.
     Raises 404 error if user does not exist.
     """
-    if user_id not in user_db:
+    user = db.get_user(user_id)
+    if user is None:
         raise HTTPException(status_code=404, detail="User does not exist")
-    return user_db[user_id]
+    return user
 
 
 # -------------------------------
@@ -148,16 +259,111 @@ def add_task(payload: TaskInput):
     Raises 404 if user doesn't exist.
     Returns added task.
     """
-    global next_task_id
-    if payload.user_id not in user_db:
+    if db.get_user(payload.user_id) is None:
         raise HTTPException(status_code=404, detail="No user with this ID")
     
-    task_info = payload.dict()
-    task_info["id"] = next_task_id
-    task_info["status"] = "pending"
-    task_db[next_task_id] = task_info
-    next_task_id += 1
-    return task_info
+    task_info = payload.model_dump()
+    task_info["status"] = TaskStatus.pending.value
+    task_info["overdue"] = False
+    return task_json(db.add_tasks([task_info])[0])
+
+
+async def read_bulk_items(request: Request) -> List[tuple]:
+    """
+    Splits a bulk body into (index, raw item) pairs.
+    - application/x-ndjson: one JSON object per line, read as a stream.
+    - anything else: a single JSON array.
+    """
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        items = []
+        pending = b""
+        async for chunk in request.stream():
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            items.extend(line for line in lines if line.strip())
+            if len(items) > MAX_BULK_TASKS:
+                break
+        if pending.strip():
+            items.append(pending)
+        return list(enumerate(items))
+
+    try:
+        body = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    return list(enumerate(body))
+
+
+@app.post("/tasks/bulk", response_model=BulkTaskResult)
+async def add_tasks_bulk(request: Request):
+    """
+    Adds many tasks in one request (JSON array or NDJSON stream of TaskInput).
+    Every item is validated first; valid items then get one contiguous block
+    of task IDs. Invalid items are reported by index and not stored.
+    Raises 413 if more than MAX_BULK_TASKS items are sent.
+    """
+    items = await read_bulk_items(request)
+    if len(items) > MAX_BULK_TASKS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_TASKS} tasks per request")
+
+    accepted = []
+    errors = []
+    known_users = {}  # user_id -> exists, so each user is looked up once per batch
+    for index, raw in items:
+        try:
+            if isinstance(raw, bytes):
+                payload = task_input_adapter.validate_json(raw)
+            else:
+                payload = task_input_adapter.validate_python(raw)
+        except ValidationError as e:
+            errors.append(BulkItemError(index=index, errors=e.errors(include_url=False, include_context=False)))
+            continue
+        if payload.user_id not in known_users:
+            known_users[payload.user_id] = await run_in_threadpool(db.get_user, payload.user_id) is not None
+        if not known_users[payload.user_id]:
+            errors.append(BulkItemError(index=index, errors=[{"loc": ["user_id"], "msg": "No user with this ID", "type": "not_found"}]))
+            continue
+        task_info = payload.model_dump()
+        task_info["status"] = TaskStatus.pending.value
+        task_info["overdue"] = False
+        accepted.append(task_info)
+
+    stored = await run_in_threadpool(db.add_tasks, accepted) if accepted else []
+    return BulkTaskResult(created=[task["id"] for task in stored], errors=errors)
+
+
+def open_tasks_due_before(before: date, limit: int, cursor: Optional[str]) -> Response:
+    """
+    One page of open tasks due before a day, ordered by (due_date, ID),
+    with the next page's cursor in the X-Next-Cursor header.
+    """
+    after = decode_cursor(cursor, True) if cursor else None
+    tasks = db.list_open_tasks_due_before(before, limit + 1, after)
+    headers = {}
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        headers["X-Next-Cursor"] = encode_cursor((tasks[-1]["due_date"], tasks[-1]["id"]))
+    return Response(content=task_rows_adapter.dump_json(tasks), media_type="application/json", headers=headers)
+
+
+@app.get("/tasks/overdue", response_model=List[TaskDetails])
+def get_overdue_tasks(limit: int = Query(100, ge=1, le=1000), cursor: Optional[str] = None):
+    """
+    Returns open (not completed) tasks whose due date has passed, oldest first.
+    Read from the due-date index, so cost follows the page size.
+    """
+    return open_tasks_due_before(date.today(), limit, cursor)
+
+
+@app.get("/tasks/due", response_model=List[TaskDetails])
+def get_tasks_due(before: date, limit: int = Query(100, ge=1, le=1000), cursor: Optional[str] = None):
+    """
+    Returns open (not completed) tasks due before the given day, soonest first.
+    Read from the due-date index, so cost follows the page size.
+    """
+    return open_tasks_due_before(before, limit, cursor)
 
 
 @app.get("/tasks/{task_id}", response_model=TaskDetails)
@@ -166,9 +372,10 @@ def fetch_task(task_id: int):
     Fetches a task by its ID.
     Raises 404 if task does not exist.
     """
-    if task_id not in task_db:
+    task = db.get_task(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task_db[task_id]
+    return task_json(task)
 
 
 @app.put("/tasks/{task_id}", response_model=TaskDetails)
@@ -178,18 +385,38 @@ def update_task(task_id: int, payload: TaskStatusUpdate):
     Validates new status before updating.
     Raises 404 if task does not exist.
     """
-    if task_id not in task_db:
+    task = db.update_status(task_id, payload.status.value)
+    if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    task_db[task_id]["status"] = payload.status
-    return task_db[task_id]
+    return task_json(task)
 
 
 @app.get("/users/{user_id}/tasks", response_model=List[TaskDetails])
-def get_tasks_for_user(user_id: int):
+def get_tasks_for_user(
+    user_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    status: Optional[TaskStatus] = None,
+    due_from: Optional[date] = None,
+    due_to: Optional[date] = None,
+):
     """
-    Returns all tasks assigned to a particular user.
+    Returns one page of tasks assigned to a particular user.
+    - Ordered by task ID, or by (due_date, ID) when a due date range is given.
+    - Optional filters: status, due_from/due_to (inclusive).
+    - Pass the X-Next-Cursor response header back as `cursor` for the next page.
+    Pages are read from sorted indexes, so cost follows the page size.
     Raises 404 if user does not exist.
     """
-    if user_id not in user_db:
+    if db.get_user(user_id) is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return [task for task in task_db.values() if task["user_id"] == user_id]
+
+    by_due_date = due_from is not None or due_to is not None
+    after = decode_cursor(cursor, by_due_date) if cursor else None
+    tasks = db.list_user_tasks(user_id, limit + 1, after, status and status.value, due_from, due_to)
+    headers = {}
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        last = tasks[-1]
+        headers["X-Next-Cursor"] = encode_cursor((last["due_date"], last["id"]) if by_due_date else (last["id"],))
+    return Response(content=task_rows_adapter.dump_json(tasks), media_type="application/json", headers=headers)
@@ -0,0 +1,475 @@
+# 🗄️ Storage backends for the Task Management System
+#
+# main.py talks to one StorageBackend. Pick the implementation with the
+# TASK_TRACKER_DB environment variable:
+#   TASK_TRACKER_DB=memory                  (default, data lost on restart)
+#   TASK_TRACKER_DB=sqlite:///tasks.db      (shared by all uvicorn workers)
+
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from datetime import date
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+
+class BlockIdAllocator:
+    """
+    Hands out IDs from blocks reserved in advance, one block per thread.
+    - The fast path is thread-local arithmetic: no lock, no database hit.
+    - `reserve(size)` claims `size` fresh IDs and returns the first one; it
+      is the only shared step and must be safe across processes.
+    - take(count) always returns the first of `count` contiguous IDs.
+    IDs stay unique but are not dense: the unused tail of a block is
+    skipped when a bigger run is needed or the process exits.
+    """
+
+    def __init__(self, reserve: Callable[[int], int], block_size: int = 1000):
+        self.reserve = reserve
+        self.block_size = block_size
+        self.local = threading.local()
+
+    def take(self, count: int = 1) -> int:
+        block = self.local
+        first = getattr(block, "next", 0)
+        if first + count > getattr(block, "end", 0):
+            size = max(count, self.block_size)
+            first = self.reserve(size)
+            block.end = first + size
+        block.next = first + count
+        return first
+
+
+class StorageBackend(ABC):
+    """
+    Everything the API needs from a database.
+    - Users and tasks are plain dicts shaped like UserInfo / TaskDetails.
+    - list_user_tasks returns up to `limit` tasks after the `after` sort key:
+      (task_id,) when ordering by ID, (due_date, task_id) when a due range is given.
+    """
+
+    @abstractmethod
+    def add_user(self, user: dict) -> dict: ...
+
+    @abstractmethod
+    def get_user(self, user_id: int) -> Optional[dict]: ...
+
+    @abstractmethod
+    def add_tasks(self, tasks: List[dict]) -> List[dict]:
+        """
+        Stores tasks under one contiguous block of new IDs, in input order.
+        """
+
+    @abstractmethod
+    def get_task(self, task_id: int) -> Optional[dict]: ...
+
+    @abstractmethod
+    def update_status(self, task_id: int, status: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def list_user_tasks(
+        self,
+        user_id: int,
+        limit: int,
+        after: Optional[tuple] = None,
+        status: Optional[str] = None,
+        due_from: Optional[date] = None,
+        due_to: Optional[date] = None,
+    ) -> List[dict]: ...
+
+    @abstractmethod
+    def list_open_tasks_due_before(self, before: date, limit: int, after: Optional[tuple] = None) -> List[dict]:
+        """
+        Tasks that are not completed and fall due before `before`,
+        ordered by (due_date, task_id), starting after the `after` key.
+        """
+
+    @abstractmethod
+    def mark_overdue(self, today: date) -> int:
+        """
+        Flags open tasks that fell due before `today` and have not been
+        flagged yet. Returns how many were flagged.
+        """
+
+    def close(self):
+        pass
+
+
+DONE_STATUS = "completed"  # Tasks in this status are never due or overdue
+
+
+# -------------------------------
+# 🧠 IN-MEMORY BACKEND
+# -------------------------------
+
+class MemoryBackend(StorageBackend):
+    """
+    Dictionaries plus secondary indexes, kept in step on every write so
+    lookups never scan every task.
+    - IDs come from per-thread blocks, so threads don't queue on a counter.
+    - Per-user indexes are guarded by striped locks (one of LOCK_STRIPES,
+      picked by user_id), so writes for different users rarely contend.
+    - Blocks make IDs arrive slightly out of order, so per-user lists use insort.
+    - Open tasks are also bucketed by due date (one sorted ID list per day),
+      so due/overdue queries and the overdue sweep only touch the days and
+      tasks they return. The sweep remembers the first day it has not swept.
+    """
+
+    LOCK_STRIPES = 64
+
+    def __init__(self, id_block_size: int = 1000):
+        self.users: Dict[int, dict] = {}
+        self.tasks: Dict[int, dict] = {}
+        self.tasks_by_user: Dict[int, List[int]] = {}  # user_id -> sorted [task_id, ...]
+        self.tasks_by_status: Dict[str, Set[int]] = {}  # status -> {task_id, ...}
+        self.tasks_by_user_status: Dict[Tuple[int, str], List[int]] = {}  # (user_id, status) -> sorted [task_id, ...]
+        self.tasks_by_user_due: Dict[int, List[Tuple[date, int]]] = {}  # user_id -> sorted [(due_date, task_id), ...]
+        self.open_due_days: List[date] = []  # Sorted days that have open tasks
+        self.open_by_due: Dict[date, List[int]] = {}  # due_date -> sorted [task_id, ...] of open tasks
+        self.swept_before = date.min  # Every open task due before this day is flagged overdue
+        self.due_lock = threading.Lock()
+        self.stripes = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self.sequences = {"users": 1, "tasks": 1}
+        self.sequence_lock = threading.Lock()  # Taken once per ID block, not per insert
+        self.user_ids = BlockIdAllocator(lambda size: self._reserve_ids("users", size), id_block_size)
+        self.task_ids = BlockIdAllocator(lambda size: self._reserve_ids("tasks", size), id_block_size)
+
+    def _reserve_ids(self, name: str, size: int) -> int:
+        with self.sequence_lock:
+            first = self.sequences[name]
+            self.sequences[name] = first + size
+        return first
+
+    def _stripe(self, user_id: int) -> threading.Lock:
+        return self.stripes[user_id % self.LOCK_STRIPES]
+
+    def add_user(self, user: dict) -> dict:
+        user = {"id": self.user_ids.take(), **user}
+        self.users[user["id"]] = user
+        return user
+
+    def get_user(self, user_id: int) -> Optional[dict]:
+        return self.users.get(user_id)
+
+    def add_tasks(self, tasks: List[dict]) -> List[dict]:
+        first_id = self.task_ids.take(len(tasks))
+        stored = []
+        for task_id, task in enumerate(tasks, start=first_id):
+            task = {"id": task_id, **task}
+            task.setdefault("overdue", False)
+            self.tasks[task_id] = task
+            with self._stripe(task["user_id"]):
+                self._index(task)
+            if task["status"] != DONE_STATUS:
+                with self.due_lock:
+                    self._open(task)
+            stored.append(task)
+        return stored
+
+    def _open(self, task: dict):
+        day = task["due_date"]
+        if day not in self.open_by_due:
+            insort(self.open_due_days, day)
+            self.open_by_due[day] = []
+        insort(self.open_by_due[day], task["id"])
+        if day < date.today():
+            task["overdue"] = True  # Already late when (re)opened
+
+    def _close(self, task: dict):
+        day = task["due_date"]
+        ids = self.open_by_due[day]
+        del ids[bisect_left(ids, task["id"])]
+        if not ids:
+            del self.open_by_due[day]
+            del self.open_due_days[bisect_left(self.open_due_days, day)]
+        task["overdue"] = False
+
+    def _index(self, task: dict):
+        insort(self.tasks_by_user.setdefault(task["user_id"], []), task["id"])
+        self.tasks_by_status.setdefault(task["status"], set()).add(task["id"])
+        insort(self.tasks_by_user_status.setdefault((task["user_id"], task["status"]), []), task["id"])
+        insort(self.tasks_by_user_due.setdefault(task["user_id"], []), (task["due_date"], task["id"]))
+
+    def get_task(self, task_id: int) -> Optional[dict]:
+        return self.tasks.get(task_id)
+
+    def update_status(self, task_id: int, status: str) -> Optional[dict]:
+        task = self.tasks.get(task_id)
+        if task is None:
+            return None
+        with self._stripe(task["user_id"]):
+            self.tasks_by_status[task["status"]].discard(task_id)
+            self.tasks_by_status.setdefault(status, set()).add(task_id)
+            old_ids = self.tasks_by_user_status[(task["user_id"], task["status"])]
+            del old_ids[bisect_left(old_ids, task_id)]
+            insort(self.tasks_by_user_status.setdefault((task["user_id"], status), []), task_id)
+            was_done = task["status"] == DONE_STATUS
+            task["status"] = status
+        if was_done != (status == DONE_STATUS):
+            with self.due_lock:
+                if status == DONE_STATUS:
+                    self._close(task)
+                else:
+                    self._open(task)
+        return task
+
+    def list_user_tasks(self, user_id, limit, after=None, status=None, due_from=None, due_to=None):
+        if due_from is None and due_to is None:
+            if status is None:
+                ids = self.tasks_by_user.get(user_id, [])
+            else:
+                ids = self.tasks_by_user_status.get((user_id, status), [])
+            start = bisect_right(ids, after[0]) if after else 0
+            return [self.tasks[task_id] for task_id in ids[start:start + limit]]
+
+        entries = self.tasks_by_user_due.get(user_id, [])
+        start = bisect_left(entries, (due_from, 0)) if due_from else 0
+        if after:
+            start = max(start, bisect_right(entries, after))
+        page = []
+        for index in range(start, len(entries)):
+            due_date, task_id = entries[index]
+            if due_to and due_date > due_to or len(page) == limit:
+                break
+            task = self.tasks[task_id]
+            if status is None or task["status"] == status:
+                page.append(task)
+        return page
+
+    def list_open_tasks_due_before(self, before, limit, after=None):
+        page = []
+        with self.due_lock:
+            start = bisect_left(self.open_due_days, after[0]) if after else 0
+            for index in range(start, len(self.open_due_days)):
+                day = self.open_due_days[index]
+                if day >= before or len(page) == limit:
+                    break
+                ids = self.open_by_due[day]
+                first = bisect_right(ids, after[1]) if after and day == after[0] else 0
+                page.extend(self.tasks[task_id] for task_id in ids[first:first + limit - len(page)])
+        return page
+
+    def mark_overdue(self, today):
+        flagged = 0
+        with self.due_lock:
+            start = bisect_left(self.open_due_days, self.swept_before)
+            end = bisect_left(self.open_due_days, today)
+            for index in range(start, end):
+                for task_id in self.open_by_due[self.open_due_days[index]]:
+                    task = self.tasks[task_id]
+                    if not task["overdue"]:
+                        task["overdue"] = True
+                        flagged += 1
+            self.swept_before = max(self.swept_before, today)
+        return flagged
+
+
+# -------------------------------
+# 🪶 SQLITE BACKEND
+# -------------------------------
+
+CREATE_TASKS = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    due_date TEXT NOT NULL,
+    status TEXT NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    overdue INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS id_sequences (
+    name TEXT PRIMARY KEY,
+    next_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    email TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_user_id ON tasks (user_id, id);
+CREATE INDEX IF NOT EXISTS tasks_user_status ON tasks (user_id, status, id);
+CREATE INDEX IF NOT EXISTS tasks_user_due ON tasks (user_id, due_date, id);
+CREATE INDEX IF NOT EXISTS tasks_open_due ON tasks (due_date, id) WHERE status != 'completed';
+CREATE INDEX IF NOT EXISTS tasks_unflagged_due ON tasks (due_date) WHERE status != 'completed' AND overdue = 0;
+INSERT OR IGNORE INTO id_sequences VALUES ('users', (SELECT COALESCE(MAX(id), 0) + 1 FROM users));
+INSERT OR IGNORE INTO id_sequences VALUES ('tasks', (SELECT COALESCE(MAX(id), 0) + 1 FROM tasks));
+"""
+
+# Statements are fixed strings so each pooled connection compiles them once
+# and then reuses them from its statement cache.
+TASK_COLUMNS = "id, title, description, due_date, status, user_id, overdue"
+SELECT_SEQUENCE = "SELECT next_id FROM id_sequences WHERE name = ?"
+ADVANCE_SEQUENCE = "UPDATE id_sequences SET next_id = next_id + ? WHERE name = ?"
+INSERT_USER = "INSERT INTO users (id, username, email) VALUES (?, ?, ?)"
+SELECT_USER = "SELECT id, username, email FROM users WHERE id = ?"
+INSERT_TASK = f"INSERT INTO tasks ({TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+SELECT_TASK = f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?"
+# Completing a task clears its overdue flag; reopening one re-checks its due date.
+UPDATE_STATUS = (
+    "UPDATE tasks SET status = ?, overdue = CASE WHEN ? = 'completed' THEN 0 "
+    "WHEN status = 'completed' THEN due_date < ? ELSE overdue END WHERE id = ?"
+)
+PAGE_BY_ID = f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?"
+PAGE_BY_STATUS = f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = ? AND status = ? AND id > ? ORDER BY id LIMIT ?"
+PAGE_BY_DUE = (
+    f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = ? AND due_date >= ? AND due_date <= ? "
+    "AND (due_date, id) > (?, ?) AND (? IS NULL OR status = ?) ORDER BY due_date, id LIMIT ?"
+)
+OPEN_DUE_BEFORE = (
+    f"SELECT {TASK_COLUMNS} FROM tasks WHERE status != 'completed' AND due_date < ? "
+    "AND (due_date, id) > (?, ?) ORDER BY due_date, id LIMIT ?"
+)
+MARK_OVERDUE = "UPDATE tasks SET overdue = 1 WHERE status != 'completed' AND overdue = 0 AND due_date < ?"
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    SQLite file in WAL mode, so readers never block the writer and every
+    uvicorn worker sees the same data. Connections come from a small pool
+    instead of being opened per request.
+    IDs come from per-thread blocks claimed from the id_sequences table, so
+    workers only meet on the sequence row once per block, not per insert.
+    """
+
+    def __init__(self, path: str, pool_size: int = 8, id_block_size: int = 1000):
+        self.path = path
+        self.pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(pool_size):
+            self.pool.put(self._connect())
+        with self.connection() as conn:
+            conn.execute(CREATE_TASKS)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+            if "overdue" not in columns:  # Database created before overdue tracking
+                conn.execute("ALTER TABLE tasks ADD COLUMN overdue INTEGER NOT NULL DEFAULT 0")
+            conn.executescript(SCHEMA)
+        self.user_ids = BlockIdAllocator(lambda size: self._reserve_ids("users", size), id_block_size)
+        self.task_ids = BlockIdAllocator(lambda size: self._reserve_ids("tasks", size), id_block_size)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None, cached_statements=64)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self.pool.get()
+        try:
+            yield conn
+        finally:
+            self.pool.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        """
+        BEGIN IMMEDIATE takes the write lock up front, so a sequence value
+        read inside the transaction cannot be claimed by another worker.
+        """
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _reserve_ids(self, name: str, size: int) -> int:
+        with self.transaction() as conn:
+            first = conn.execute(SELECT_SEQUENCE, (name,)).fetchone()[0]
+            conn.execute(ADVANCE_SEQUENCE, (size, name))
+        return first
+
+    @staticmethod
+    def _task(row) -> dict:
+        return {
+            "id": row[0],
+            "title": row[1],
+            "description": row[2],
+            "due_date": date.fromisoformat(row[3]),
+            "status": row[4],
+            "user_id": row[5],
+            "overdue": bool(row[6]),
+        }
+
+    def add_user(self, user: dict) -> dict:
+        user = {"id": self.user_ids.take(), **user}
+        with self.connection() as conn:
+            conn.execute(INSERT_USER, (user["id"], user["username"], user["email"]))
+        return user
+
+    def get_user(self, user_id: int) -> Optional[dict]:
+        with self.connection() as conn:
+            row = conn.execute(SELECT_USER, (user_id,)).fetchone()
+        return {"id": row[0], "username": row[1], "email": row[2]} if row else None
+
+    def add_tasks(self, tasks: List[dict]) -> List[dict]:
+        first_id = self.task_ids.take(len(tasks))
+        stored = [{"id": task_id, **task} for task_id, task in enumerate(tasks, start=first_id)]
+        with self.transaction() as conn:
+            conn.executemany(INSERT_TASK, [
+                (t["id"], t["title"], t["description"], t["due_date"].isoformat(), t["status"], t["user_id"], t.get("overdue", False))
+                for t in stored
+            ])
+        return stored
+
+    def get_task(self, task_id: int) -> Optional[dict]:
+        with self.connection() as conn:
+            row = conn.execute(SELECT_TASK, (task_id,)).fetchone()
+        return self._task(row) if row else None
+
+    def update_status(self, task_id: int, status: str) -> Optional[dict]:
+        with self.transaction() as conn:
+            conn.execute(UPDATE_STATUS, (status, status, date.today().isoformat(), task_id))
+            row = conn.execute(SELECT_TASK, (task_id,)).fetchone()
+        return self._task(row) if row else None
+
+    def list_user_tasks(self, user_id, limit, after=None, status=None, due_from=None, due_to=None):
+        with self.connection() as conn:
+            if due_from is None and due_to is None:
+                after_id = after[0] if after else 0
+                if status is None:
+                    rows = conn.execute(PAGE_BY_ID, (user_id, after_id, limit))
+                else:
+                    rows = conn.execute(PAGE_BY_STATUS, (user_id, status, after_id, limit))
+            else:
+                after_due, after_id = (after[0].isoformat(), after[1]) if after else ("", 0)
+                rows = conn.execute(PAGE_BY_DUE, (
+                    user_id,
+                    due_from.isoformat() if due_from else "",
+                    due_to.isoformat() if due_to else "9999-12-31",
+                    after_due, after_id, status, status, limit,
+                ))
+            return [self._task(row) for row in rows]
+
+    def list_open_tasks_due_before(self, before, limit, after=None):
+        after_due, after_id = (after[0].isoformat(), after[1]) if after else ("", 0)
+        with self.connection() as conn:
+            rows = conn.execute(OPEN_DUE_BEFORE, (before.isoformat(), after_due, after_id, limit))
+            return [self._task(row) for row in rows]
+
+    def mark_overdue(self, today):
+        with self.transaction() as conn:
+            return conn.execute(MARK_OVERDUE, (today.isoformat(),)).rowcount
+
+    def close(self):
+        while not self.pool.empty():
+            self.pool.get_nowait().close()
+
+
+def create_backend(url: str) -> StorageBackend:
+    """
+    Builds a backend from a TASK_TRACKER_DB style URL.
+    """
+    if url == "memory":
+        return MemoryBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    raise ValueError(f"Unknown storage backend: {url!r} (use 'memory' or 'sqlite:///path.db')")
@@ -6,37 +6,200 @@ Persistent client-side data.
 Like loyalty punch cards.
 """
 
-from typing import Optional
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import struct
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import date
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional
+
 from fastapi import FastAPI, Cookie, Response
+from fastapi.concurrency import run_in_threadpool
+
+# -------------------------------
+# 🔏 SIGNED VISIT COOKIE
+# -------------------------------
+# One cookie instead of two, packed as binary and signed so the client
+# cannot forge its visit count:
+#   key id (1 byte) | visitor id (8) | visits (4) | last visit, epoch s (4) | HMAC-SHA256[:16]
+# 33 bytes -> 44 URL-safe base64 characters, no padding.
+
+COOKIE_NAME = "visit_state"
+PAYLOAD = struct.Struct("<BQII")
+MAC_BYTES = 16
+COOKIE_MAX_AGE = 30 * 24 * 60 * 60  # 30 days
+
+
+def load_signing_keys(spec: Optional[str]) -> Dict[int, bytes]:
+    """
+    Parses COOKIE_SIGNING_KEYS="2:newsecret,1:oldsecret". The first key
+    signs new cookies; the others are only accepted, so a key can be
+    rotated without logging everyone out. Without the variable a random
+    key is generated (cookies then die with the process).
+    """
+    if not spec:
+        return {1: secrets.token_bytes(32)}
+    keys = {}
+    for item in spec.split(","):
+        key_id, _, secret = item.strip().partition(":")
+        keys[int(key_id)] = secret.encode()
+    return keys
+
+
+signing_keys = load_signing_keys(os.environ.get("COOKIE_SIGNING_KEYS"))
+current_key_id = next(iter(signing_keys))
+
+
+def rotate_keys(keys: Dict[int, bytes]):
+    """
+    Installs a new key set (first key signs) and drops cached verifications.
+    """
+    global signing_keys, current_key_id
+    signing_keys, current_key_id = keys, next(iter(keys))
+    decode_visit_cookie.cache_clear()
+
+
+class VisitState(NamedTuple):
+    visitor_id: int
+    visits: int
+    last_visit: int  # Unix time
+
+
+def sign(key_id: int, payload: bytes) -> bytes:
+    return hmac.new(signing_keys[key_id], payload, hashlib.sha256).digest()[:MAC_BYTES]
+
+
+def encode_visit_cookie(state: VisitState) -> str:
+    payload = PAYLOAD.pack(current_key_id, *state)
+    return base64.urlsafe_b64encode(payload + sign(current_key_id, payload)).decode()
+
+
+@lru_cache(maxsize=65536)
+def decode_visit_cookie(value: str) -> Optional[VisitState]:
+    """
+    Returns the state, or None for anything tampered, truncated or signed
+    with an unknown key. Cached: a cookie is sent with every request until
+    it is replaced, so the HMAC is computed once per value.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(value)
+    except ValueError:
+        return None
+    if len(raw) != PAYLOAD.size + MAC_BYTES:
+        return None
+    payload, mac = raw[:PAYLOAD.size], raw[PAYLOAD.size:]
+    key_id, visitor_id, visits, last_visit = PAYLOAD.unpack(payload)
+    if key_id not in signing_keys or not hmac.compare_digest(mac, sign(key_id, payload)):
+        return None
+    return VisitState(visitor_id, visits, last_visit)
+
+
+# -------------------------------
+# 📊 VISIT COUNTERS
+# -------------------------------
+# Visits per day are counted in memory and written to the database in
+# batches of VISIT_FLUSH_EVERY, rather than one write per request.
+
+class VisitCounter:
+    CREATE = "CREATE TABLE IF NOT EXISTS daily_visits (day TEXT PRIMARY KEY, visits INTEGER NOT NULL)"
+    UPSERT = (
+        "INSERT INTO daily_visits (day, visits) VALUES (?, ?) "
+        "ON CONFLICT(day) DO UPDATE SET visits = visits + excluded.visits"
+    )
+
+    def __init__(self, path: str = ":memory:", flush_every: int = 1000):
+        # One connection shared by the threadpool, serialized by a lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute(self.CREATE)
+        self.flush_every = flush_every
+        self.pending: Counter = Counter()
+        self.pending_total = 0
+
+    async def record(self, day: date):
+        self.pending[day.isoformat()] += 1
+        self.pending_total += 1
+        if self.pending_total >= self.flush_every:
+            await self.flush()
+
+    async def flush(self):
+        # Swap first: visits recorded while the write runs go to the next batch
+        batch, self.pending, self.pending_total = self.pending, Counter(), 0
+        if batch:
+            await run_in_threadpool(self.write, batch)
+
+    def write(self, batch: Counter):
+        with self.lock, self.conn:
+            self.conn.executemany(self.UPSERT, batch.items())
+
+    def totals(self) -> Dict[str, int]:
+        """
+        Stored counts plus the not-yet-flushed batch.
+        """
+        with self.lock:
+            stored = Counter(dict(self.conn.execute("SELECT day, visits FROM daily_visits")))
+        return dict(stored + self.pending)
+
+
+visit_counter = VisitCounter(
+    os.environ.get("VISIT_DB", ":memory:"),
+    int(os.environ.get("VISIT_FLUSH_EVERY", 1000))
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await visit_counter.flush()
+
+
+app = FastAPI(lifespan=lifespan)
 
-app = FastAPI()
 
 @app.get("/visit")
 async def track_visits(
-    visits: int = Cookie(0, alias="customer_visits"),
-    last_visit: Optional[str] = Cookie(None)
+    visit_state: Optional[str] = Cookie(None, alias=COOKIE_NAME)
 ):
     """
     Example Cookies:
-    customer_visits=3
-    last_visit=2023-01-15
-    
+    visit_state=AQ...  (signed: visitor id, visit count, last visit)
+
     Key Features:
     - Persistent across requests
     - Server can set cookies
-    - Automatic type conversion
+    - Signed, so the count cannot be edited client-side
     - HttpOnly/Secure flags
     """
-    
-    from datetime import datetime
-    response = Response(content=f"Visit #{visits + 1}")
-    response.set_cookie(
-        key="customer_visits",
-        value=str(visits + 1),
-        max_age=30*24*60*60  # 30 days
-    )
+    state = decode_visit_cookie(visit_state) if visit_state else None
+    if state is None:  # New visitor, or a cookie that failed verification
+        state = VisitState(secrets.randbits(64), 0, 0)
+
+    state = VisitState(state.visitor_id, state.visits + 1, int(time.time()))
+    await visit_counter.record(date.today())
+
+    response = Response(content=f"Visit #{state.visits}")
     response.set_cookie(
-        key="last_visit",
-        value=datetime.now().isoformat()
+        key=COOKIE_NAME,
+        value=encode_visit_cookie(state),
+        max_age=COOKIE_MAX_AGE,
+        httponly=True,
+        samesite="lax"
     )
-    return response
\ No newline at end of file
+    return response
+
+
+@app.get("/visits/daily")
+async def daily_visits():
+    """
+    Visits per day across all customers.
+    """
+    return visit_counter.totals()
@@ -6,10 +6,195 @@ File upload handling.
 Like submitting documents at office.
 """
 
-from fastapi import FastAPI, Form, UploadFile, File
-from fastapi.responses import JSONResponse
+import asyncio
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Form, Header, HTTPException, Query, Request, Response, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweeper = asyncio.create_task(sweep_upload_sessions())
+    yield
+    sweeper.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Uploads are read in fixed-size chunks and written straight to disk,
+# so memory use stays flat no matter how big the file is.
+CHUNK_SIZE = 1024 * 1024  # 1 MiB
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 100 * 1024 * 1024))
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "uploads"))
+
+ALLOWED_TYPES = [
+    "application/pdf",
+    "image/jpeg",
+    "image/png"
+]
+
+# Magic bytes each allowed type must start with
+SIGNATURES = {
+    "application/pdf": b"%PDF-",
+    "image/jpeg": b"\xff\xd8\xff",
+    "image/png": b"\x89PNG\r\n\x1a\n",
+}
+SNIFF_BYTES = max(len(signature) for signature in SIGNATURES.values())
+
+
+def sniff_content_type(head: memoryview) -> Optional[str]:
+    """
+    Detects the real file type from its first bytes.
+    Compares memoryview slices, so the chunk is never copied.
+    """
+    for content_type, signature in SIGNATURES.items():
+        if head[:len(signature)] == signature:
+            return content_type
+    return None
+
+
+@dataclass
+class SpooledUpload:
+    path: str
+    size: int
+    sha256: str
+
+
+async def check_signature(chunks: AsyncIterator[bytes], expected_type: str) -> AsyncIterator[bytes]:
+    """
+    Passes chunks through once the first bytes match expected_type.
+    Raises 400 on a mismatch before the rest of the body is read.
+    The first chunk is inspected in place; only a tiny leading chunk
+    (under SNIFF_BYTES) is ever buffered.
+    """
+    def verify(head: memoryview):
+        if sniff_content_type(head) != expected_type:
+            raise HTTPException(status_code=400, detail=f"File content is not {expected_type}")
+
+    verified = False
+    head = b""
+    async for chunk in chunks:
+        if not verified:
+            if head or len(chunk) < SNIFF_BYTES:
+                head += chunk
+                chunk = head
+                if len(chunk) < SNIFF_BYTES:
+                    continue
+            verify(memoryview(chunk))
+            verified = True
+        yield chunk
+    if not verified:  # Whole file is shorter than SNIFF_BYTES
+        verify(memoryview(head))
+        yield head
+
+
+async def spool_upload(
+    chunks: AsyncIterator[bytes],
+    expected_type: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+) -> SpooledUpload:
+    """
+    Copies an upload chunk by chunk into a file under UPLOAD_DIR while
+    hashing it, and gives up with 413 as soon as it grows past max_bytes.
+    With expected_type, the magic bytes are checked before anything is
+    written (see check_signature).
+    Disk writes run in the threadpool so the event loop keeps serving.
+    """
+    max_bytes = max_bytes or MAX_UPLOAD_BYTES
+    if expected_type is not None:
+        chunks = check_signature(chunks, expected_type)
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    spool = tempfile.NamedTemporaryFile(dir=UPLOAD_DIR, prefix="upload-", delete=False)
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"File larger than {max_bytes} bytes")
+            digest.update(chunk)
+            await run_in_threadpool(spool.write, chunk)
+        spool.close()
+    except BaseException:
+        spool.close()
+        os.unlink(spool.name)
+        raise
+    return SpooledUpload(path=spool.name, size=size, sha256=digest.hexdigest())
+
+
+async def read_upload_file(document: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await document.read(CHUNK_SIZE):
+        yield chunk
+
+
+# -------------------------------
+# 🗂️ CONTENT-ADDRESSED DOCUMENT STORE
+# -------------------------------
+# Each distinct file is kept once, at objects/<first 2 hash chars>/<sha256>.
+# Uploading the same bytes again only bumps a reference count: the hash is
+# known when the stream ends, so the spooled copy is simply discarded.
+
+@dataclass
+class StoredDocument:
+    sha256: str
+    path: str
+    size: int
+    content_type: str
+    refs: int = 0
+    uploads: List[dict] = field(default_factory=list)  # filename/description per reference
+
+
+documents: Dict[str, StoredDocument] = {}
+
+
+def object_path(sha256: str) -> str:
+    return os.path.join(UPLOAD_DIR, "objects", sha256[:2], sha256)
+
+
+def store_document(upload: SpooledUpload, content_type: str, filename: Optional[str], description: str) -> tuple:
+    """
+    Files a spooled upload under its hash. Returns (document, duplicate).
+    Runs without awaiting, so concurrent uploads of the same file cannot
+    both decide they are the first copy.
+    """
+    document = documents.get(upload.sha256)
+    duplicate = document is not None
+    if duplicate:
+        os.unlink(upload.path)  # Metadata-only write: the bytes are already stored
+    else:
+        path = object_path(upload.sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(upload.path, path)
+        document = documents[upload.sha256] = StoredDocument(upload.sha256, path, upload.size, content_type)
+    document.refs += 1
+    document.uploads.append({"filename": filename, "description": description})
+    return document, duplicate
+
+
+def upload_summary(filename: Optional[str], content_type: str, description: str, upload: SpooledUpload) -> dict:
+    document, duplicate = store_document(upload, content_type, filename, description)
+    return {
+        "filename": filename,
+        "type": content_type,
+        "description": description,
+        "size": f"{upload.size / 1024:.1f} KB",
+        "sha256": upload.sha256,
+        "duplicate": duplicate,
+        "url": f"/documents/{upload.sha256}"
+    }
 
-app = FastAPI()
 
 @app.post("/upload")
 async def upload_document(
@@ -21,36 +206,376 @@ async def upload_document(
     --------------------------
     Content-Disposition: form-data; name="document"; filename="doc.pdf"
     Content-Type: application/pdf
-    
+
     <FILE DATA>
     --------------------------
     Content-Disposition: form-data; name="description"
-    
+
     My important document
     --------------------------
-    
+
     Key Features:
     - Handles large files
-    - Streaming support
+    - Copied to storage in chunks
     - Metadata with form fields
-    - File type validation
+    - File type validation (declared type and magic bytes)
+
+    Starlette receives and spools the whole multipart body before this
+    runs, so size and type are only checked after the upload has arrived.
+    Use PUT /upload/stream to abort oversized or mistyped files early.
     """
-    
+
     # Validate file type
-    allowed_types = [
-        "application/pdf", 
-        "image/jpeg",
-        "image/png"
-    ]
-    if document.content_type not in allowed_types:
+    if document.content_type not in ALLOWED_TYPES:
+        return JSONResponse(
+            {"error": "Invalid file type"},
+            status_code=400
+        )
+
+    # The body is already spooled (that is how the size is known); this only
+    # avoids copying an oversized file into the store
+    if document.size is not None and document.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"File larger than {MAX_UPLOAD_BYTES} bytes")
+
+    upload = await spool_upload(read_upload_file(document), document.content_type)
+    return upload_summary(document.filename, document.content_type, description, upload)
+
+
+@app.put("/upload/stream")
+async def upload_document_stream(
+    request: Request,
+    filename: str = Query(..., description="Original file name"),
+    description: str = Query(...)
+):
+    """
+    Example Request:
+    PUT /upload/stream?filename=doc.pdf&description=My%20document
+    Content-Type: application/pdf
+
+    <FILE DATA as the raw body>
+
+    Key Features:
+    - No multipart parsing: the body streams straight to disk
+    - Content-Length checked before reading, size re-checked per chunk,
+      so an oversized upload is cut off early
+    - SHA-256 computed on the fly
+    - Magic bytes must match Content-Type, checked on the first chunk
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type not in ALLOWED_TYPES:
         return JSONResponse(
             {"error": "Invalid file type"},
             status_code=400
         )
-    
+
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"File larger than {MAX_UPLOAD_BYTES} bytes")
+
+    upload = await spool_upload(request.stream(), content_type)
+    return upload_summary(filename, content_type, description, upload)
+
+
+# -------------------------------
+# ⏯️ RESUMABLE UPLOADS
+# -------------------------------
+# tus-style: create a session with the total size, PATCH the bytes in
+# order (each PATCH says where it starts with Upload-Offset), and HEAD the
+# session after a dropped connection to learn where to resume.
+# Each session holds an open file and preallocated disk space, so at most
+# MAX_UPLOAD_SESSIONS may be open at once, and a session that sees no
+# PATCH for UPLOAD_SESSION_TTL seconds expires (Upload-Expires tells the
+# client when) and is swept away.
+
+MAX_UPLOAD_SESSIONS = int(os.environ.get("MAX_UPLOAD_SESSIONS", 100))
+UPLOAD_SESSION_TTL = float(os.environ.get("UPLOAD_SESSION_TTL", 60 * 60))
+UPLOAD_SWEEP_SECONDS = float(os.environ.get("UPLOAD_SWEEP_SECONDS", 60))
+
+@dataclass
+class UploadSession:
+    id: str
+    path: str
+    fd: int
+    length: int
+    content_type: str
+    filename: str
+    description: str
+    expires: float = 0.0  # Unix time, pushed back by every PATCH
+    offset: int = 0
+    head: bytes = b""  # First SNIFF_BYTES, kept until the type is verified
+    digest: Any = field(default_factory=hashlib.sha256)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+upload_sessions: Dict[str, UploadSession] = {}
+
+
+def preallocate(fd: int, length: int):
+    """
+    Reserves the whole file up front, so chunks are written in place and a
+    full disk fails at creation rather than halfway through.
+    """
+    if hasattr(os, "posix_fallocate"):
+        os.posix_fallocate(fd, 0, length)
+    else:
+        os.ftruncate(fd, length)
+
+
+def get_session(upload_id: str) -> UploadSession:
+    session = upload_sessions.get(upload_id)
+    if session is not None and is_expired(session, time.time()):
+        discard_session(session)
+        session = None
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+
+def is_expired(session: UploadSession, now: float) -> bool:
+    # A session with a PATCH in flight is never expired under it
+    return session.expires <= now and not session.lock.locked()
+
+
+def expire_upload_sessions(now: float) -> int:
+    """
+    Discards every expired session. Returns how many were dropped.
+    """
+    expired = [session for session in upload_sessions.values() if is_expired(session, now)]
+    for session in expired:
+        discard_session(session)
+    return len(expired)
+
+
+async def sweep_upload_sessions():
+    """
+    Background loop that frees the files of abandoned uploads.
+    """
+    while True:
+        expire_upload_sessions(time.time())
+        await asyncio.sleep(UPLOAD_SWEEP_SECONDS)
+
+
+def discard_session(session: UploadSession):
+    upload_sessions.pop(session.id, None)
+    os.close(session.fd)
+    os.unlink(session.path)
+
+
+def offset_headers(session: UploadSession) -> dict:
     return {
-        "filename": document.filename,
-        "type": document.content_type,
-        "description": description,
-        "size": f"{document.size / 1024:.1f} KB"
-    }
\ No newline at end of file
+        "Upload-Offset": str(session.offset),
+        "Upload-Length": str(session.length),
+        "Upload-Expires": formatdate(session.expires, usegmt=True),
+        "Cache-Control": "no-store",
+    }
+
+
+async def write_chunk(session: UploadSession, chunk: bytes):
+    """
+    Writes one chunk at the session offset and feeds the hash. Chunks
+    arrive strictly in order, so the SHA-256 and magic-byte check run
+    incrementally without re-reading the file.
+    """
+    if session.offset + len(chunk) > session.length:
+        raise HTTPException(status_code=413, detail="Chunk runs past Upload-Length")
+    if session.offset < SNIFF_BYTES:
+        session.head += chunk[:SNIFF_BYTES - session.offset]
+        if len(session.head) >= SNIFF_BYTES or session.offset + len(chunk) == session.length:
+            if sniff_content_type(memoryview(session.head)) != session.content_type:
+                discard_session(session)
+                raise HTTPException(status_code=400, detail=f"File content is not {session.content_type}")
+    await run_in_threadpool(os.pwrite, session.fd, chunk, session.offset)
+    session.digest.update(chunk)
+    session.offset += len(chunk)
+
+
+@app.post("/upload/resumable", status_code=201)
+async def create_upload_session(
+    response: Response,
+    upload_length: int = Header(..., alias="Upload-Length", ge=1),
+    content_type: str = Query(..., description="Type of the file that will be sent"),
+    filename: str = Query(..., description="Original file name"),
+    description: str = Query(...)
+):
+    """
+    Example Request:
+    POST /upload/resumable?content_type=application/pdf&filename=doc.pdf&description=My%20document
+    Upload-Length: 73400320
+
+    Key Features:
+    - Size and type checked before any data is sent
+    - The file is preallocated; chunks are written in place
+    - Location header points at the session
+    - Upload-Expires says when an idle session is dropped
+    - 503 while MAX_UPLOAD_SESSIONS uploads are already open
+    """
+    if content_type not in ALLOWED_TYPES:
+        return JSONResponse(
+            {"error": "Invalid file type"},
+            status_code=400
+        )
+    if upload_length > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"File larger than {MAX_UPLOAD_BYTES} bytes")
+    if len(upload_sessions) >= MAX_UPLOAD_SESSIONS and not expire_upload_sessions(time.time()):
+        raise HTTPException(status_code=503, detail="Too many uploads in progress", headers={"Retry-After": "60"})
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix="resumable-")
+    try:
+        await run_in_threadpool(preallocate, fd, upload_length)
+    except OSError:
+        os.close(fd)
+        os.unlink(path)
+        raise HTTPException(status_code=507, detail="Not enough space for this upload")
+
+    session = UploadSession(uuid.uuid4().hex, path, fd, upload_length, content_type, filename, description)
+    session.expires = time.time() + UPLOAD_SESSION_TTL
+    upload_sessions[session.id] = session
+    response.headers["Location"] = f"/upload/resumable/{session.id}"
+    response.headers.update(offset_headers(session))
+    return {"upload_id": session.id, "offset": 0, "length": upload_length}
+
+
+@app.head("/upload/resumable/{upload_id}")
+async def upload_session_offset(upload_id: str):
+    """
+    Tells a client how many bytes have been stored, i.e. where to resume.
+    """
+    session = get_session(upload_id)
+    return Response(status_code=200, headers=offset_headers(session))
+
+
+@app.patch("/upload/resumable/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0)
+):
+    """
+    Example Request:
+    PATCH /upload/resumable/<upload_id>
+    Content-Type: application/offset+octet-stream
+    Upload-Offset: 10485760
+
+    <next bytes of the file>
+
+    Key Features:
+    - Upload-Offset must equal the stored offset (409 otherwise)
+    - Bytes already written survive a dropped connection
+    - One PATCH at a time per session; sessions never wait on each other
+    - Each PATCH pushes Upload-Expires back
+    - The final chunk returns the same summary as POST /upload
+    """
+    session = get_session(upload_id)
+    if request.headers.get("content-type") != "application/offset+octet-stream":
+        raise HTTPException(status_code=415, detail="Content-Type must be application/offset+octet-stream")
+    if session.lock.locked():
+        raise HTTPException(status_code=409, detail="Another chunk is being written to this upload")
+
+    async with session.lock:
+        if upload_offset != session.offset:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload-Offset {upload_offset} does not match stored offset {session.offset}",
+                headers=offset_headers(session)
+            )
+        async for chunk in request.stream():
+            if chunk:
+                await write_chunk(session, chunk)
+
+        session.expires = time.time() + UPLOAD_SESSION_TTL
+        headers = offset_headers(session)
+        if session.offset < session.length:
+            return Response(status_code=204, headers=headers)
+
+        upload_sessions.pop(session.id)
+        os.close(session.fd)
+        upload = SpooledUpload(path=session.path, size=session.length, sha256=session.digest.hexdigest())
+        summary = upload_summary(session.filename, session.content_type, session.description, upload)
+        return JSONResponse(summary, headers=headers)
+
+
+@app.delete("/upload/resumable/{upload_id}", status_code=204)
+async def cancel_upload_session(upload_id: str):
+    """
+    Abandons an unfinished upload and frees its preallocated file.
+    """
+    session = get_session(upload_id)
+    if session.lock.locked():
+        raise HTTPException(status_code=409, detail="A chunk is being written to this upload")
+    discard_session(session)
+    return Response(status_code=204)
+
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def mapped_range(path: str, start: int, end: int) -> AsyncIterator[memoryview]:
+    """
+    Yields [start, end] of a file as slices of a memory map: the bytes go
+    from the page cache to the socket without an extra read() copy.
+    """
+    async def body():
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # The map is released once the last slice handed to the server is freed
+        view = memoryview(mapped)
+        for offset in range(start, end + 1, CHUNK_SIZE):
+            yield view[offset:min(offset + CHUNK_SIZE, end + 1)]
+    return body()
+
+
+@app.get("/documents/{sha256}")
+async def download_document(sha256: str, range_header: Optional[str] = Header(None, alias="Range")):
+    """
+    Example Request:
+    GET /documents/<sha256>
+    Range: bytes=0-1023
+
+    Key Features:
+    - Whole files are sent with FileResponse (sendfile where the server supports it)
+    - Single byte ranges are answered with 206 from a memory map
+    - The hash doubles as a strong ETag
+    """
+    document = documents.get(sha256)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    headers = {"Accept-Ranges": "bytes", "ETag": f'"{sha256}"'}
+
+    match = RANGE_PATTERN.match(range_header or "")
+    if match is None or match.groups() == ("", ""):
+        # No Range, or several ranges: leave it to FileResponse
+        return FileResponse(document.path, media_type=document.content_type, headers=headers)
+
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), document.size - 1) if last else document.size - 1
+    else:
+        start, end = max(document.size - int(last), 0), document.size - 1
+    if start > end or start >= document.size:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{document.size}"})
+
+    headers["Content-Range"] = f"bytes {start}-{end}/{document.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        mapped_range(document.path, start, end),
+        status_code=206,
+        media_type=document.content_type,
+        headers=headers
+    )
+
+
+@app.delete("/documents/{sha256}")
+async def release_document(sha256: str):
+    """
+    Drops one reference to a document; the file is removed with the last one.
+    """
+    document = documents.get(sha256)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    document.refs -= 1
+    document.uploads.pop()
+    if document.refs == 0:
+        del documents[sha256]
+        os.unlink(document.path)
+    return {"sha256": sha256, "refs": document.refs}
@@ -6,30 +6,132 @@ Traditional web form submission.
 Like filling paper forms field by field.
 """
 
-from fastapi import FastAPI, Form
+import asyncio
+import base64
+import hashlib
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Form, HTTPException
+
+# -------------------------------
+# 🔐 PASSWORD HASHING
+# -------------------------------
+# scrypt is deliberately slow (tens of ms of CPU per hash). It runs in a
+# process pool so the event loop keeps serving while hashes are computed,
+# and at most MAX_PENDING_HASHES registrations may be hashing or waiting
+# for a worker at once; beyond that new ones get 503 straight away instead
+# of piling up.
+
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 14, 8, 1
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", os.cpu_count() or 1))
+MAX_PENDING_HASHES = int(os.environ.get("MAX_PENDING_HASHES", HASH_WORKERS * 4))
+
+
+def hash_password(password: str, salt: Optional[bytes] = None) -> str:
+    """
+    Returns "scrypt$n$r$p$<salt>$<hash>" (base64), so parameters can be
+    raised later without breaking stored hashes.
+    """
+    salt = salt or secrets.token_bytes(16)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=32)
+    salt_b64, digest_b64 = base64.b64encode(salt).decode(), base64.b64encode(digest).decode()
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt_b64}${digest_b64}"
+
+
+class PasswordHasher:
+    """
+    Bounded front for the process pool. `pending` counts registrations
+    that are hashing or queued for a worker.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, max_pending: int = MAX_PENDING_HASHES):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    async def hash(self, password: str) -> str:
+        if self.pending >= self.max_pending:
+            raise HTTPException(status_code=503, detail="Too many registrations in progress", headers={"Retry-After": "1"})
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, hash_password, password)
+        finally:
+            self.pending -= 1
+
+
+# -------------------------------
+# 👤 REGISTRATION STORE
+# -------------------------------
+
+@dataclass
+class RegisteredUser:
+    username: str
+    email: str
+    password_hash: str
+
+
+users: Dict[str, RegisteredUser] = {}
+hasher = PasswordHasher()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    hasher.start()
+    yield
+    hasher.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+async def register(username: str, password: str, email: str) -> RegisteredUser:
+    key = username.lower()
+    if key in users:  # Cheap rejection before spending a hash on it
+        raise HTTPException(status_code=409, detail="Username already taken")
+    password_hash = await hasher.hash(password)
+    if key in users:  # Another request won the race while we were hashing
+        raise HTTPException(status_code=409, detail="Username already taken")
+    user = users[key] = RegisteredUser(username, email, password_hash)
+    return user
 
-app = FastAPI()
 
 @app.post("/register")
 async def register_user(
     username: str = Form(..., min_length=4),
     password: str = Form(..., min_length=8),
-    email: str = Form(..., regex=r'^[^@]+@[^@]+\.[^@]+$')
+    email: str = Form(..., pattern=r'^[^@]+@[^@]+\.[^@]+$')
 ):
     """
     Example Form Data:
     username=alikhan
     password=secure123
     email=ali@example.com
-    
+
     Key Features:
     - application/x-www-form-urlencoded
     - Field-by-field submission
     - HTML form compatible
     - Requires python-multipart
+    - Password stored only as a scrypt hash, computed off the event loop
+    - 409 for a taken username, 503 when the hashing queue is full
     """
+    user = await register(username, password, email)
     return {
-        "username": username,
-        "email": email,
+        "username": user.username,
+        "email": user.email,
         "status": "registered"
-    }
\ No newline at end of file
+    }
@@ -6,30 +6,263 @@ Background metadata in HTTP headers.
 Like showing VIP card at entrance.
 """
 
-from typing import Optional
-from fastapi import FastAPI, Header
+import hashlib
+import hmac
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 
 app = FastAPI()
 
+# -------------------------------
+# 🔑 KEY STORE
+# -------------------------------
+# Each API key has an owner and a bearer token. Only the token's SHA-256
+# is stored, so a leaked database does not leak working tokens.
+
+@dataclass(frozen=True)
+class Principal:
+    api_key: str
+    owner: str
+
+
+@dataclass(frozen=True)
+class StoredKey:
+    principal: Principal
+    token_sha256: str
+    revoked: bool = False
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class KeyStore(ABC):
+    """
+    Where credentials live. Swap in another implementation (a remote
+    service, a secrets manager) by passing it to CredentialVerifier.
+    """
+
+    @abstractmethod
+    def lookup(self, api_key: str) -> Optional[StoredKey]: ...
+
+
+class SQLiteKeyStore(KeyStore):
+    CREATE = (
+        "CREATE TABLE IF NOT EXISTS api_keys ("
+        "api_key TEXT PRIMARY KEY, owner TEXT NOT NULL, token_sha256 TEXT NOT NULL, "
+        "revoked INTEGER NOT NULL DEFAULT 0)"
+    )
+    SELECT = "SELECT owner, token_sha256, revoked FROM api_keys WHERE api_key = ?"
+    UPSERT = "INSERT OR REPLACE INTO api_keys (api_key, owner, token_sha256, revoked) VALUES (?, ?, ?, 0)"
+    REVOKE = "UPDATE api_keys SET revoked = 1 WHERE api_key = ?"
+
+    def __init__(self, path: str = ":memory:"):
+        # One connection shared by the threadpool, serialized by a lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute(self.CREATE)
+
+    def add_keys(self, keys: Iterable[Tuple[str, str, str]]):
+        """
+        Stores (api_key, owner, bearer_token) triples.
+        """
+        rows = [(api_key, owner, token_digest(token)) for api_key, owner, token in keys]
+        with self.lock, self.conn:
+            self.conn.executemany(self.UPSERT, rows)
+
+    def revoke(self, api_key: str):
+        with self.lock, self.conn:
+            self.conn.execute(self.REVOKE, (api_key,))
+
+    def lookup(self, api_key: str) -> Optional[StoredKey]:
+        with self.lock:
+            row = self.conn.execute(self.SELECT, (api_key,)).fetchone()
+        if row is None:
+            return None
+        owner, token_sha256, revoked = row
+        return StoredKey(Principal(api_key, owner), token_sha256, bool(revoked))
+
+
+# -------------------------------
+# ✅ VERIFIER
+# -------------------------------
+# Verified keys are kept in an LRU with a TTL, together with the token
+# that proved them and the key's rate-limit buckets. A repeat request
+# costs one dict hit plus a constant-time token compare; the store is
+# only consulted on a miss or after the entry expires. Unknown and
+# revoked keys are cached too (for a shorter time, in their own smaller
+# LRU so a scan of random keys cannot evict valid ones), so hammering
+# the API with a bad key does not hammer the store.
+#
+# Each key has a request bucket. Failed attempts are limited separately
+# and much more tightly, per (key, client address): a client out of
+# failure tokens for a key gets 429 before its token is even compared,
+# which caps online guessing of a known key's token at failure_rate per
+# second per address, while the key's owner, calling from elsewhere, is
+# not locked out. Only clients with recent failures have a bucket.
+
+class TokenBucket:
+    __slots__ = ("tokens", "refilled")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.refilled = now
+
+    def refill(self, now: float, rate: float, burst: float) -> float:
+        self.tokens = min(burst, self.tokens + (now - self.refilled) * rate)
+        self.refilled = now
+        return self.tokens
+
+
+class CacheEntry:
+    __slots__ = ("expires", "stored", "requests")
+
+    def __init__(self, expires: float, stored: Optional[StoredKey], burst: float, now: float):
+        self.expires = expires
+        self.stored = stored  # None: negative entry
+        self.requests = TokenBucket(burst, now)
+
+
+class CredentialVerifier:
+    def __init__(
+        self,
+        store: KeyStore,
+        cache_size: int = 10_000,
+        negative_cache_size: int = 1_000,
+        ttl: float = 60.0,
+        negative_ttl: float = 5.0,
+        rate: float = 10.0,
+        burst: float = 20.0,
+        failure_rate: float = 0.1,
+        failure_burst: float = 5.0,
+        failure_cache_size: int = 10_000,
+    ):
+        self.store = store
+        self.cache_size = cache_size
+        self.negative_cache_size = negative_cache_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.rate = rate  # Requests per second per key, refilled continuously
+        self.burst = burst
+        self.failure_rate = failure_rate  # Failed attempts per second per (key, client)
+        self.failure_burst = failure_burst
+        self.failure_cache_size = failure_cache_size
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.negative: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.failures: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+
+    async def entry_for(self, api_key: str, now: float) -> CacheEntry:
+        entry = self.cache.get(api_key) or self.negative.get(api_key)
+        if entry is not None and entry.expires > now:
+            (self.cache if entry.stored is not None else self.negative).move_to_end(api_key)
+            return entry
+
+        stored = await run_in_threadpool(self.store.lookup, api_key)
+        if stored is not None and stored.revoked:
+            stored = None
+        ttl = self.ttl if stored is not None else self.negative_ttl
+        fresh = CacheEntry(now + ttl, stored, self.burst, now)
+        if entry is not None:
+            # Refreshing an expired entry must not hand out a full bucket
+            fresh.requests = entry.requests
+        self.invalidate(api_key)
+        cache, limit = (self.cache, self.cache_size) if stored is not None else (self.negative, self.negative_cache_size)
+        cache[api_key] = fresh
+        if len(cache) > limit:
+            cache.popitem(last=False)
+        return fresh
+
+    def take_token(self, bucket: TokenBucket, now: float, rate: float, burst: float):
+        if bucket.refill(now, rate, burst) < 1:
+            retry_after = (1 - bucket.tokens) / rate
+            raise HTTPException(status_code=429, detail="Rate limit exceeded", headers={"Retry-After": str(int(retry_after) + 1)})
+        bucket.tokens -= 1
+
+    def failure_bucket(self, key: Tuple[str, str], now: float) -> TokenBucket:
+        bucket = self.failures.get(key)
+        if bucket is not None:
+            self.failures.move_to_end(key)
+            return bucket
+        bucket = self.failures[key] = TokenBucket(self.failure_burst, now)
+        if len(self.failures) > self.failure_cache_size:
+            self.failures.popitem(last=False)
+        return bucket
+
+    async def verify(self, api_key: str, bearer_token: str, client: str) -> Principal:
+        """
+        Returns who is calling, or raises 401 (bad credentials) / 429 (too many requests).
+        `client` is the caller's address; failed attempts are limited per key and address.
+        """
+        now = time.monotonic()
+        entry = await self.entry_for(api_key, now)
+        # Spend a failure token up front and refund it on success, so a
+        # client out of failure tokens is refused without comparing the token
+        failures = self.failure_bucket((api_key, client), now)
+        self.take_token(failures, now, self.failure_rate, self.failure_burst)
+        if entry.stored is None or not hmac.compare_digest(entry.stored.token_sha256, token_digest(bearer_token)):
+            raise HTTPException(status_code=401, detail="Invalid API key or token", headers={"WWW-Authenticate": "Bearer"})
+        failures.tokens += 1
+        if failures.tokens >= self.failure_burst:  # No recent failures left to remember
+            self.failures.pop((api_key, client), None)
+        self.take_token(entry.requests, now, self.rate, self.burst)
+        return entry.stored.principal
+
+    def invalidate(self, api_key: str):
+        """
+        Forgets a cached key, e.g. right after revoking or rotating it.
+        """
+        self.cache.pop(api_key, None)
+        self.negative.pop(api_key, None)
+
+
+key_store = SQLiteKeyStore(os.environ.get("API_KEY_DB", ":memory:"))
+key_store.add_keys([("key-123", "demo", "abc123")])
+verifier = CredentialVerifier(key_store)
+
+
+def bearer_token(authorization: str) -> str:
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Expected 'Authorization: Bearer <token>'", headers={"WWW-Authenticate": "Bearer"})
+    return token.strip()
+
+
 @app.get("/secure")
 async def secure_endpoint(
+    request: Request,
     authorization: str = Header(..., alias="Authorization"),
     user_agent: Optional[str] = Header(None),
-    x_api_key: str = Header(..., regex=r'^key-\d{3}$')
+    x_api_key: str = Header(..., pattern=r'^key-\d{3,8}$')
 ):
     """
     Example Headers:
     Authorization: Bearer abc123
     X-API-Key: key-123
-    
+
     Key Features:
     - Automatic header name conversion
     - Case-insensitive
     - Special headers like User-Agent
     - Custom validation
+    - Key + token checked against the key store, cached with a TTL
+    - Per-key rate limit (429 with Retry-After)
+    - Failed attempts have their own, much lower limit per client address
     """
+    client = request.client.host if request.client else ""
+    principal = await verifier.verify(x_api_key, bearer_token(authorization), client)
     return {
         "auth_type": authorization.split()[0],
         "client": user_agent,
-        "api_key_valid": True
-    }
\ No newline at end of file
+        "api_key_valid": True,
+        "owner": principal.owner
+    }
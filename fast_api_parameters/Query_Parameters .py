@@ -6,18 +6,162 @@ Optional filters after ? in URL.
 Like specifying pizza toppings and size.
 """
 
+import os
+from collections import OrderedDict
+
+import numpy as np
 from fastapi import FastAPI, Query
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 app = FastAPI()
 
+# -------------------------------
+# 🛒 PRODUCT CATALOG
+# -------------------------------
+# Column-oriented: one NumPy array per field, rows sorted by price.
+# Because of that order, a price range is one contiguous slice of rows
+# (two binary searches), and every per-(category, size) row list is
+# sorted by price too, so it can be cut to the same range with searchsorted.
+
+CATEGORIES = ["electronics", "books", "clothing", "toys", "garden", "sports", "kitchen", "beauty"]
+SIZES = ["XS", "S", "M", "L", "XL"]
+CATALOG_SIZE = int(os.environ.get("CATALOG_SIZE", 1_000_000))
+
+
+class ProductCatalog:
+    def __init__(self, product_id, category, price, size, stock):
+        order = np.argsort(price, kind="stable")
+        self.product_id = product_id[order]
+        self.category = category[order]
+        self.price = price[order]
+        self.size = size[order]
+        self.stock = stock[order]
+        # Row numbers per (category, size), ascending and so also by price
+        self.rows_by_category_size = {
+            (category_name, size_name): np.flatnonzero((self.category == category_code) & (self.size == size_code))
+            for category_code, category_name in enumerate(CATEGORIES)
+            for size_code, size_name in enumerate(SIZES)
+        }
+
+    @classmethod
+    def synthetic(cls, count: int, seed: int = 42) -> "ProductCatalog":
+        rng = np.random.default_rng(seed)
+        return cls(
+            product_id=np.arange(1, count + 1, dtype=np.int32),
+            category=rng.integers(0, len(CATEGORIES), count, dtype=np.int8),
+            price=np.round(rng.lognormal(3.5, 1.0, count), 2),
+            size=rng.integers(0, len(SIZES), count, dtype=np.int8),
+            stock=np.where(rng.random(count) < 0.8, rng.integers(1, 500, count), 0).astype(np.int32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def price_slice(self, min_price: Optional[float], max_price: Optional[float]) -> Tuple[int, int]:
+        start = 0 if min_price is None else int(np.searchsorted(self.price, min_price, side="left"))
+        stop = len(self) if max_price is None else int(np.searchsorted(self.price, max_price, side="right"))
+        return start, stop
+
+    def query(self, category: str, min_price: Optional[float], max_price: Optional[float],
+              sizes: Tuple[str, ...], in_stock: bool) -> np.ndarray:
+        """
+        Row numbers matching every filter, cheapest first.
+        Category, size and price are binary searches into the prebuilt
+        row lists; only the stock check is a mask over the survivors.
+        """
+        start, stop = self.price_slice(min_price, max_price)
+        parts = []
+        for size in sizes or SIZES:
+            rows = self.rows_by_category_size.get((category, size))
+            if rows is not None:
+                parts.append(rows[np.searchsorted(rows, start):np.searchsorted(rows, stop)])
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        rows = np.concatenate(parts)
+        if len(parts) > 1:
+            rows.sort()  # Back into price order
+        if in_stock:
+            rows = rows[self.stock[rows] > 0]
+        return rows
+
+    def products(self, rows: np.ndarray) -> List[dict]:
+        columns = zip(
+            self.product_id[rows].tolist(),
+            self.category[rows].tolist(),
+            self.price[rows].tolist(),
+            self.size[rows].tolist(),
+            self.stock[rows].tolist(),
+        )
+        return [
+            {"id": product_id, "category": CATEGORIES[category], "price": price, "size": SIZES[size], "stock": stock}
+            for product_id, category, price, size, stock in columns
+        ]
+
+
+catalog = ProductCatalog.synthetic(CATALOG_SIZE)
+
+
+def normalize_filters(category: str, min_price: Optional[float], max_price: Optional[float],
+                      sizes: List[str], in_stock: bool) -> tuple:
+    """
+    Canonical form of a query, so ?size=L&size=S and ?size=s&size=l
+    share one cache entry.
+    """
+    return (category.strip().lower(), min_price, max_price, tuple(sorted({size.upper() for size in sizes})), in_stock)
+
+
+class QueryCache:
+    """
+    LRU of query results, bounded by the bytes of the row arrays rather
+    than by entry count: the key includes free-form prices, so a count
+    limit alone lets one client pin a lot of memory. Rows are kept as
+    int32 (half of intp), and a result bigger than max_entry_bytes is
+    not cached at all, since one huge entry would evict everything else.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.bytes = 0
+        self.entries: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+
+    def get(self, filters: tuple) -> np.ndarray:
+        rows = self.entries.get(filters)
+        if rows is not None:
+            self.entries.move_to_end(filters)
+            return rows
+        rows = catalog.query(*filters).astype(np.int32)
+        rows.flags.writeable = False  # Shared between requests
+        if rows.nbytes <= self.max_entry_bytes:
+            self.entries[filters] = rows
+            self.bytes += rows.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+        return rows
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+
+QUERY_CACHE_BYTES = int(os.environ.get("QUERY_CACHE_BYTES", 32 * 1024 * 1024))
+query_cache = QueryCache(QUERY_CACHE_BYTES, max_entry_bytes=QUERY_CACHE_BYTES // 64)
+
+
+def cached_query(filters: tuple) -> np.ndarray:
+    return query_cache.get(filters)
+
+
 @app.get("/products")
 async def filter_products(
     category: str = Query(..., min_length=3),
     min_price: float = Query(None, gt=0),
     max_price: float = Query(None, gt=0),
     sizes: List[str] = Query(["M"], alias="size"),
-    in_stock: bool = Query(True)
+    in_stock: bool = Query(True),
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
 ):
     """
     Example Request: 
@@ -29,12 +173,18 @@ async def filter_products(
     - Optional parameters
     - Default values
     - Aliases for JS-friendly names
+    - Filters run as NumPy binary searches and masks over 1M products
+    - in_stock=false drops the stock filter
     """
+    filters = normalize_filters(category, min_price, max_price, sizes, in_stock)
+    rows = cached_query(filters)
     return {
         "filters": {
             "category": category,
             "price_range": f"{min_price}-{max_price}",
             "sizes": sizes,
             "in_stock": in_stock
-        }
-    }
\ No newline at end of file
+        },
+        "total": len(rows),
+        "products": catalog.products(rows[offset:offset + limit])
+    }
@@ -6,24 +6,48 @@ Complex data sent in request body.
 Like submitting full job application at once.
 """
 
-from fastapi import FastAPI
-from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+import json
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter, ValidationError
 
 app = FastAPI()
 
 class Address(BaseModel):
     street: str = Field(..., example="123 Main St")
     city: str = Field(..., example="Karachi")
-    postal_code: str = Field(..., regex=r'^\d{5}$')
+    postal_code: str = Field(..., pattern=r'^\d{5}$')
 
 class JobApplication(BaseModel):
     name: str = Field(..., min_length=3)
     email: EmailStr
-    education: List[str] = Field(..., min_items=1)
+    education: List[str] = Field(..., min_length=1)
     address: Address
     cover_letter: Optional[str] = None
 
+
+# Built once: validating each NDJSON line reuses the compiled validator
+application_adapter = TypeAdapter(JobApplication)
+
+WRITE_BATCH_SIZE = 500  # Accepted applications per bulk write
+MAX_LINE_BYTES = 64 * 1024
+
+applications: Dict[int, dict] = {}
+next_application_id = 1
+
+
+def store_applications(batch: List[JobApplication]) -> List[int]:
+    """
+    Saves a batch in one go and returns the new IDs, in order.
+    """
+    global next_application_id
+    first = next_application_id
+    next_application_id += len(batch)
+    applications.update(zip(range(first, next_application_id), (item.model_dump() for item in batch)))
+    return list(range(first, next_application_id))
+
 @app.post("/applications")
 async def submit_application(app: JobApplication):
     """
@@ -45,8 +69,104 @@ async def submit_application(app: JobApplication):
     - Automatic documentation
     - JSON parsing
     """
+    application_id, = store_applications([app])
     return {
+        "id": application_id,
         "status": "received",
         "applicant": app.name,
         "contact": app.email
-    }
\ No newline at end of file
+    }
+
+
+async def ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple]:
+    """
+    Yields (line number, raw line) from a byte stream, skipping blank
+    lines. A line longer than MAX_LINE_BYTES is yielded as None and the
+    rest of it is dropped, so one huge line cannot exhaust memory.
+    """
+    number = 0
+    pending = b""
+    oversized = False
+    async for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            number += 1
+            if oversized or len(line) > MAX_LINE_BYTES:
+                oversized = False
+                yield number, None
+            elif line.strip():
+                yield number, line
+        if len(pending) > MAX_LINE_BYTES:
+            pending, oversized = b"", True
+    if oversized or pending.strip():
+        yield number + 1, None if oversized else pending
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Sends results while the request body is still arriving. The stock
+    StreamingResponse (below ASGI spec 2.4) listens on `receive` for a
+    disconnect, which would swallow the body chunks we are reading; here
+    request.stream() itself raises ClientDisconnect if the client goes.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+def result_line(result: dict) -> bytes:
+    return json.dumps(result).encode() + b"\n"
+
+
+async def process_applications(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Validates each line as it arrives and writes accepted applications
+    WRITE_BATCH_SIZE at a time. Results for a batch are sent once it is
+    written, so at most one batch is held in memory.
+    """
+    accepted = []  # (line number, application)
+    results = []   # (line number, result) waiting for the batch write
+
+    def flush():
+        ids = store_applications([application for _, application in accepted])
+        results.extend((number, {"line": number, "status": "accepted", "id": application_id})
+                       for (number, _), application_id in zip(accepted, ids))
+        results.sort(key=lambda item: item[0])
+        output = b"".join(result_line(result) for _, result in results)
+        accepted.clear()
+        results.clear()
+        return output
+
+    async for number, line in ndjson_lines(chunks):
+        if line is None:
+            results.append((number, {"line": number, "status": "rejected", "errors": [{"msg": f"Line longer than {MAX_LINE_BYTES} bytes"}]}))
+            continue
+        try:
+            accepted.append((number, application_adapter.validate_json(line)))
+        except ValidationError as e:
+            errors = e.errors(include_url=False, include_context=False, include_input=False)
+            results.append((number, {"line": number, "status": "rejected", "errors": errors}))
+        if len(accepted) >= WRITE_BATCH_SIZE or len(results) >= WRITE_BATCH_SIZE:
+            yield flush()
+    if accepted or results:
+        yield flush()
+
+
+@app.post("/applications/batch")
+async def submit_applications_batch(request: Request):
+    """
+    Example Request Body (application/x-ndjson, one application per line):
+    {"name": "Ali Khan", "email": "ali@example.com", "education": ["BS CS"], "address": {...}}
+    {"name": "Sara Ahmed", "email": "sara@example.com", "education": ["MBA"], "address": {...}}
+
+    Example Response (streamed, one result per line):
+    {"line": 1, "status": "accepted", "id": 41}
+    {"line": 2, "status": "rejected", "errors": [...]}
+
+    Key Features:
+    - Any number of applications; memory stays bounded
+    - Each line validated on its own, bad lines don't sink the batch
+    - Accepted applications written in bulk
+    """
+    return DuplexStreamingResponse(process_applications(request.stream()), media_type="application/x-ndjson")
\ No newline at end of file
@@ -0,0 +1,361 @@
+# ⏱️ FastAPI parameter demo benchmarks
+# Run from this folder:  python benchmark.py <upload|dedup|catalog|products|auth|cookies|registration|applications>
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import resource
+import tempfile
+import time
+
+import File_Parameters
+
+
+def load_module(name: str, filename: str):
+    """
+    Imports a demo whose file name is not a valid module name.
+    """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(os.path.dirname(os.path.abspath(__file__)), filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def time_call(fn, repeat: int) -> float:
+    """
+    Returns the mean wall time of fn() in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_upload(args):
+    """
+    Streams a synthetic upload of --size-mb through spool_upload and reports
+    throughput and peak RSS, which should stay flat whatever the size.
+    """
+    chunk = os.urandom(File_Parameters.CHUNK_SIZE)
+    chunks = args.size_mb * 1024 * 1024 // len(chunk)
+
+    async def body():
+        for _ in range(chunks):
+            yield chunk
+
+    with tempfile.TemporaryDirectory() as tmp:
+        File_Parameters.UPLOAD_DIR = tmp
+        before = peak_rss_mb()
+        start = time.perf_counter()
+        upload = asyncio.run(File_Parameters.spool_upload(body(), max_bytes=chunks * len(chunk)))
+        elapsed = time.perf_counter() - start
+        print(f"uploaded {upload.size / 2**20:,.0f} MiB in {elapsed:.1f}s ({upload.size / 2**20 / elapsed:,.0f} MiB/s)")
+        print(f"peak RSS: {before:,.0f} MiB before, {peak_rss_mb():,.0f} MiB after")
+
+
+def bench_dedup(args):
+    """
+    Duplicate-heavy workload: --uploads uploads of --file-kb each, drawn
+    from only --distinct different files. Compares time per upload for
+    first copies and duplicates, and bytes on disk against bytes received.
+    """
+    import random
+
+    files = [b"%PDF-1.7 " + os.urandom(args.file_kb * 1024) for _ in range(args.distinct)]
+    rng = random.Random(1)
+
+    async def body(data):
+        for offset in range(0, len(data), File_Parameters.CHUNK_SIZE):
+            yield data[offset:offset + File_Parameters.CHUNK_SIZE]
+
+    async def run():
+        timings = {False: [], True: []}
+        for n in range(args.uploads):
+            data = rng.choice(files)
+            start = time.perf_counter()
+            upload = await File_Parameters.spool_upload(body(data), "application/pdf")
+            _, duplicate = File_Parameters.store_document(upload, "application/pdf", f"file{n}.pdf", "bench")
+            timings[duplicate].append(time.perf_counter() - start)
+        return timings
+
+    with tempfile.TemporaryDirectory() as tmp:
+        File_Parameters.UPLOAD_DIR = tmp
+        File_Parameters.documents.clear()
+        timings = asyncio.run(run())
+        on_disk = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(tmp) for name in names)
+    received = sum(doc.size * doc.refs for doc in File_Parameters.documents.values())
+    for duplicate, label in ((False, "first copies"), (True, "duplicates")):
+        if timings[duplicate]:
+            mean = sum(timings[duplicate]) / len(timings[duplicate]) * 1e3
+            print(f"{label:>13}: {len(timings[duplicate]):>5} uploads, {mean:.2f} ms each")
+    print(f"received {received / 2**20:,.1f} MiB, stored {on_disk / 2**20:,.1f} MiB")
+
+
+def bench_catalog(args):
+    """
+    Filter latency over the 1M-product catalog: the NumPy query, the same
+    filters as a Python loop over row dicts, and a cached repeat.
+    """
+    start = time.perf_counter()
+    Query_Parameters = load_module("Query_Parameters", "Query_Parameters .py")
+    catalog = Query_Parameters.catalog
+    print(f"built {len(catalog):,}-row catalog in {time.perf_counter() - start:.2f}s")
+    rows = catalog.products(range(len(catalog)))
+
+    def python_loop(category, min_price, max_price, sizes, in_stock):
+        return [
+            row for row in rows
+            if row["category"] == category
+            and (min_price is None or row["price"] >= min_price)
+            and (max_price is None or row["price"] <= max_price)
+            and row["size"] in sizes
+            and (not in_stock or row["stock"] > 0)
+        ]
+
+    queries = [
+        ("electronics", None, None, ("M",), True),
+        ("books", 10.0, 50.0, ("L", "S"), True),
+        ("toys", 100.0, None, ("L", "M", "S", "XL", "XS"), False),
+    ]
+    print(f"{'filters':>52} {'rows':>8} {'numpy µs':>9} {'loop µs':>9} {'cached µs':>9}")
+    for filters in queries:
+        count = len(catalog.query(*filters))
+        assert count == len(python_loop(*filters))
+        vectorized = time_call(lambda: catalog.query(*filters), args.repeat)
+        looped = time_call(lambda: python_loop(*filters), max(1, args.repeat // 100))
+        Query_Parameters.cached_query(filters)
+        cached = time_call(lambda: Query_Parameters.cached_query(filters), args.repeat)
+        print(f"{str(filters):>52} {count:>8,} {vectorized:>9.0f} {looped:>9.0f} {cached:>9.2f}")
+
+
+def bench_products(args):
+    """
+    Memory per product in the packed store at --products (10M by default)
+    against a dict per product, plus lookup latency for both.
+    """
+    import random
+    import sys
+    import tracemalloc
+
+    os.environ["PRODUCT_STORE_SIZE"] = "0"
+    path_parameters = load_module("path_parameters", "path_parameters.py")
+
+    start = time.perf_counter()
+    store = path_parameters.ProductStore.synthetic(args.products)
+    built = time.perf_counter() - start
+    # The store is a handful of flat buffers, so their sizes are the whole cost
+    buffers = [store.records, *store.products_by_category.values()]
+    packed = sum(sys.getsizeof(buffer) for buffer in buffers) / args.products
+
+    baseline_count = min(args.products, 1_000_000)
+    tracemalloc.start()
+    dicts = {
+        product_id: {"product_id": product_id, "name": f"Product {product_id}", "category_id": 1 + product_id % 50,
+                     "price": (199 + product_id * 37 % 50_000) / 100, "stock": product_id * 7 % 120}
+        for product_id in range(1, baseline_count + 1)
+    }
+    per_dict = tracemalloc.get_traced_memory()[0] / baseline_count
+    tracemalloc.stop()
+
+    ids = [random.randint(1, baseline_count) for _ in range(1000)]
+    print(f"built {args.products:,} packed products in {built:.1f}s")
+    print(f"packed store: {packed:>6.1f} bytes/product ({packed * args.products / 2**20:,.0f} MiB)")
+    print(f"dict/product: {per_dict:>6.1f} bytes/product (measured on {baseline_count:,}; "
+          f"{per_dict * args.products / 2**20:,.0f} MiB at {args.products:,})")
+    print(f"get(): packed {time_call(lambda: [store.get(i) for i in ids], 100) / 1000:.2f} µs, "
+          f"dict {time_call(lambda: [dicts[i] for i in ids], 100) / 1000:.2f} µs")
+    print(f"in_category(): {time_call(lambda: [store.in_category(1 + i % 50, i) for i in ids], 100) / 1000:.2f} µs")
+
+
+def bench_auth(args):
+    """
+    /secure credential checks over --keys distinct API keys with a skewed
+    (Zipf-like) request mix: every call going to the key store, against
+    the TTL+LRU cache in front of it. Reports p50/p99 per verification.
+    """
+    import random
+    import statistics
+
+    import Header_Parameters
+
+    store = Header_Parameters.SQLiteKeyStore()
+    store.add_keys((f"key-{n:06d}", f"owner{n}", f"token{n}") for n in range(args.keys))
+    rng = random.Random(3)
+    weights = [1 / rank for rank in range(1, args.keys + 1)]
+    requests = [(f"key-{n:06d}", f"token{n}") for n in rng.choices(range(args.keys), weights, k=args.requests)]
+
+    async def run(verifier):
+        latencies = []
+        for api_key, token in requests:
+            start = time.perf_counter()
+            await verifier.verify(api_key, token, "127.0.0.1")
+            latencies.append((time.perf_counter() - start) * 1e6)
+        return sorted(latencies)
+
+    print(f"{args.keys:,} keys, {args.requests:,} requests")
+    print(f"{'':>10} {'p50 µs':>8} {'p99 µs':>8} {'mean µs':>8}")
+    for name, cache_size in (("no cache", 0), ("cached", args.keys)):
+        verifier = Header_Parameters.CredentialVerifier(store, cache_size=cache_size, rate=1e9, burst=1e9)
+        latencies = asyncio.run(run(verifier))
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(f"{name:>10} {statistics.median(latencies):>8.1f} {p99:>8.1f} {statistics.mean(latencies):>8.1f}")
+
+
+def bench_cookies(args):
+    """
+    Per-request cost of the signed visit cookie: encoding a new one,
+    verifying an unseen value, and verifying a cached one, next to the
+    old plain str()/int() pair. Then the batched counter against one
+    database write per visit.
+    """
+    import Cookie_Parameters
+    from datetime import date
+
+    states = [Cookie_Parameters.VisitState(n, n % 1000, 1_700_000_000 + n) for n in range(args.requests)]
+    cookies = [Cookie_Parameters.encode_visit_cookie(state) for state in states]
+    print(f"cookie: {len(cookies[0])} characters")
+
+    def per_item(fn, items) -> float:
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        return (time.perf_counter() - start) / len(items) * 1e6
+
+    Cookie_Parameters.decode_visit_cookie.cache_clear()
+    runs = {
+        "plain str/int": per_item(lambda state: int(str(state.visits)), states),
+        "encode": per_item(Cookie_Parameters.encode_visit_cookie, states),
+        "verify (uncached)": per_item(Cookie_Parameters.decode_visit_cookie.__wrapped__, cookies),
+        "verify (cached)": per_item(Cookie_Parameters.decode_visit_cookie, cookies[:1000] * (len(cookies) // 1000)),
+    }
+    for name, cost in runs.items():
+        print(f"{name:>18}: {cost:>6.2f} µs")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for flush_every in (1, 1000):
+            counter = Cookie_Parameters.VisitCounter(os.path.join(tmp, f"visits{flush_every}.db"), flush_every)
+
+            async def run():
+                for _ in range(args.requests // 10):
+                    await counter.record(date.today())
+                await counter.flush()
+
+            start = time.perf_counter()
+            asyncio.run(run())
+            cost = (time.perf_counter() - start) / (args.requests // 10) * 1e6
+            print(f"{'counter, flush ' + str(flush_every):>18}: {cost:>6.2f} µs/visit")
+
+
+def bench_registration(args):
+    """
+    Event-loop lag while --registrations passwords are hashed:
+    a 1 ms ticker task records how late it wakes up. "inline" hashes on
+    the loop itself (what a plain hashlib.scrypt call in the endpoint
+    would do); "process pool" is the current path.
+    """
+    import statistics
+
+    import Form_Parameters
+
+    count = args.registrations
+
+    async def inline_hash(password):
+        return Form_Parameters.hash_password(password)
+
+    async def run(hash_fn):
+        lags = []
+        done = asyncio.Event()
+
+        async def ticker():
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lags.append((time.perf_counter() - start - 0.001) * 1e3)
+
+        tick = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        await asyncio.gather(*(hash_fn(f"password{n}") for n in range(count)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await tick
+        return elapsed, sorted(lags)
+
+    hasher = Form_Parameters.PasswordHasher(max_pending=count)
+    hasher.start()
+    print(f"{count} registrations, {hasher.workers} hash workers")
+    print(f"{'':>13} {'hashes/s':>9} {'lag p50 ms':>11} {'lag max ms':>11}")
+    for name, hash_fn in (("inline", inline_hash), ("process pool", hasher.hash)):
+        elapsed, lags = asyncio.run(run(hash_fn))
+        print(f"{name:>13} {count / elapsed:>9.0f} {statistics.median(lags):>11.2f} {lags[-1]:>11.2f}")
+    hasher.shutdown()
+
+
+def bench_applications(args):
+    """
+    POST /applications/batch with --requests NDJSON lines (1 in 10 invalid),
+    streamed in 64 KiB chunks, against one POST /applications per item.
+    """
+    import json
+
+    from fastapi.testclient import TestClient
+
+    import Request_Body
+
+    client = TestClient(Request_Body.app)
+    good = {"name": "Ali Khan", "email": "ali@example.com", "education": ["BS Computer Science"],
+            "address": {"street": "123 Main St", "city": "Karachi", "postal_code": "12345"}}
+    lines = [json.dumps(dict(good, name=f"Applicant {n}", email="bad" if n % 10 == 0 else f"a{n}@example.com"))
+             for n in range(args.requests)]
+
+    def body():
+        data = "\n".join(lines).encode()
+        for offset in range(0, len(data), 64 * 1024):
+            yield data[offset:offset + 64 * 1024]
+
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    response = client.post("/applications/batch", content=body(), headers={"Content-Type": "application/x-ndjson"})
+    elapsed = time.perf_counter() - start
+    statuses = [json.loads(line)["status"] for line in response.iter_lines()]
+    print(f"batch:  {len(statuses) / elapsed:>8,.0f} lines/s ({statuses.count('accepted'):,} accepted, "
+          f"{statuses.count('rejected'):,} rejected), peak RSS {before:,.0f} -> {peak_rss_mb():,.0f} MiB")
+
+    singles = [json.loads(line) for line in lines[:2000]]
+    start = time.perf_counter()
+    for application in singles:
+        client.post("/applications", json=application)
+    print(f"single: {len(singles) / (time.perf_counter() - start):>8,.0f} requests/s")
+
+
+BENCHMARKS = {
+    "upload": bench_upload,
+    "dedup": bench_dedup,
+    "catalog": bench_catalog,
+    "products": bench_products,
+    "auth": bench_auth,
+    "cookies": bench_cookies,
+    "registration": bench_registration,
+    "applications": bench_applications,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FastAPI parameter demo benchmarks")
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--uploads", type=int, default=1000)
+    parser.add_argument("--distinct", type=int, default=20)
+    parser.add_argument("--file-kb", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--products", type=int, default=10_000_000)
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--registrations", type=int, default=200)
+    args = parser.parse_args()
+    BENCHMARKS[args.name](args)
@@ -6,10 +6,105 @@ Essential identifiers in the URL path itself.
 Like specifying exact house number to visit.
 """
 
-from fastapi import FastAPI, Path
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Path, Query
 
 app = FastAPI()
 
+# -------------------------------
+# 📦 PRODUCT STORE
+# -------------------------------
+# Products are fixed-size packed records in one bytearray instead of a
+# dict per product. IDs are dense (1, 2, 3, ...), so a product's record
+# sits at (product_id - 1) * RECORD.size: lookup is O(1) with no hashing.
+
+RECORD = struct.Struct("<HII")  # category_id, price in cents, stock -> 10 bytes
+EMPTY_CATEGORY = 0  # Category IDs start at 1; 0 marks an unused slot
+PRODUCT_STORE_SIZE = int(os.environ.get("PRODUCT_STORE_SIZE", 100_000))
+
+
+class ProductStore:
+    def __init__(self):
+        self.records = bytearray()
+        # Composite (category_id, product_id) index: sorted product IDs per category
+        self.products_by_category: Dict[int, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.records) // RECORD.size
+
+    def add(self, product_id: int, category_id: int, price_cents: int, stock: int):
+        if category_id == EMPTY_CATEGORY:
+            raise ValueError("category_id must be positive")
+        offset = (product_id - 1) * RECORD.size
+        if offset >= len(self.records):
+            self.records.extend(bytes(offset + RECORD.size - len(self.records)))
+        else:
+            old_category = RECORD.unpack_from(self.records, offset)[0]
+            if old_category != EMPTY_CATEGORY:
+                ids = self.products_by_category[old_category]
+                del ids[bisect_left(ids, product_id)]
+        RECORD.pack_into(self.records, offset, category_id, price_cents, stock)
+
+        ids = self.products_by_category.setdefault(category_id, array("I"))
+        if not ids or ids[-1] < product_id:
+            ids.append(product_id)  # The usual case: IDs arrive in order
+        else:
+            ids.insert(bisect_left(ids, product_id), product_id)
+
+    def get(self, product_id: int) -> Optional[dict]:
+        offset = (product_id - 1) * RECORD.size
+        if product_id < 1 or offset >= len(self.records):
+            return None
+        category_id, price_cents, stock = RECORD.unpack_from(self.records, offset)
+        if category_id == EMPTY_CATEGORY:
+            return None
+        return {
+            "product_id": product_id,
+            "name": f"Product {product_id}",
+            "category_id": category_id,
+            "price": price_cents / 100,
+            "stock": stock
+        }
+
+    def in_category(self, category_id: int, product_id: int) -> bool:
+        ids = self.products_by_category.get(category_id)
+        if ids is None:
+            return False
+        position = bisect_left(ids, product_id)
+        return position < len(ids) and ids[position] == product_id
+
+    def category_page(self, category_id: int, after: int, limit: int) -> List[int]:
+        """
+        Up to `limit` product IDs in the category greater than `after`.
+        """
+        ids = self.products_by_category.get(category_id, array("I"))
+        start = bisect_right(ids, after)
+        return ids[start:start + limit].tolist()
+
+    @classmethod
+    def synthetic(cls, count: int, categories: int = 50) -> "ProductStore":
+        store = cls()
+        store.records = bytearray(count * RECORD.size)  # Preallocated: every slot starts empty
+        for product_id in range(1, count + 1):
+            store.add(product_id, 1 + product_id % categories, 199 + product_id * 37 % 50_000, product_id * 7 % 120)
+        return store
+
+
+product_store = ProductStore.synthetic(PRODUCT_STORE_SIZE)
+
+
+def find_product(product_id: int) -> dict:
+    product = product_store.get(product_id)
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product
+
+
 @app.get("/products/{product_id}")
 async def get_product(
     product_id: int = Path(
@@ -28,12 +123,9 @@ async def get_product(
     - Required by default
     - Position matters in route
     - Strong type conversion
+    - O(1) lookup in the packed product store
     """
-    return {
-        "product_id": product_id,
-        "name": f"Product {product_id}",
-        "stock": 15
-    }
+    return find_product(product_id)
 
 # Nested path example
 @app.get("/categories/{category_id}/products/{product_id}")
@@ -41,8 +133,27 @@ async def nested_path(
     category_id: int,
     product_id: int = Path(..., gt=0)
 ):
+    if not product_store.in_category(category_id, product_id):
+        raise HTTPException(status_code=404, detail="Product not found in this category")
     return {
         "category": category_id,
-        "product": product_id,
+        "product": find_product(product_id),
         "path": f"/categories/{category_id}/products/{product_id}"
+    }
+
+
+@app.get("/categories/{category_id}/products")
+async def list_category_products(
+    category_id: int,
+    after: int = Query(0, ge=0, description="Last product ID of the previous page"),
+    limit: int = Query(50, ge=1, le=1000)
+):
+    """
+    Example Request: GET /categories/7/products?after=1057&limit=50
+
+    Pages through the (category_id, product_id) index in ID order.
+    """
+    return {
+        "category": category_id,
+        "products": [product_store.get(product_id) for product_id in product_store.category_page(category_id, after, limit)]
     }
\ No newline at end of file
@@ -1,6 +1,14 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from pydantic import BaseModel
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+import hashlib
+import heapq
+import json
+import math
+import re
+import threading
 
 app = FastAPI(title="Notes API", description="Simple CRUD Notes Application")
 
@@ -13,6 +21,181 @@ notes_db: Dict[int, str] = {
     5: "Fifth note"
 }
 
+# IDs only ever grow, so a deleted note's ID is never handed out again.
+# Endpoints run in the threadpool, so every change to notes_db, note_ids,
+# note_versions, note_bodies and the search index, and every read that
+# needs them to agree, holds notes_lock: IDs stay unique, note_ids stays
+# sorted, and a version always names exactly one text.
+next_note_id = max(notes_db) + 1
+notes_lock = threading.Lock()
+
+# Note IDs in ascending order, for cheap limit/offset/cursor pages
+note_ids: List[int] = sorted(notes_db)
+
+# Bumped on every update; a note's ETag is "<id>-<version>"
+note_versions: Dict[int, int] = {note_id: 1 for note_id in notes_db}
+
+# Serialized GET /notes/{id} bodies as (version, body). A body is only
+# served for the version it was rendered at, so one rendered just before
+# a concurrent update can never be served after it.
+note_bodies: Dict[int, Tuple[int, bytes]] = {}
+
+# Full-text search index (BM25 ranking)
+class NoteSearchIndex:
+    """
+    Inverted index over note text, updated on every add/update/delete.
+    Not thread-safe by itself: callers hold notes_lock.
+    - postings: term -> {note_id: term frequency}
+    - terms: every indexed term in sorted order, for prefix lookups
+    """
+    k1 = 1.2
+    b = 0.75
+    max_prefix_terms = 50  # Cap on how many terms one prefix may expand to
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.terms: List[str] = []
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return re.findall(r"\w+", text.lower())
+
+    def add(self, note_id: int, text: str):
+        tokens = self.tokenize(text)
+        self.doc_lengths[note_id] = len(tokens)
+        self.total_length += len(tokens)
+        for term in tokens:
+            docs = self.postings.get(term)
+            if docs is None:
+                docs = self.postings[term] = {}
+                insort(self.terms, term)
+            docs[note_id] = docs.get(note_id, 0) + 1
+
+    def remove(self, note_id: int, text: str):
+        self.total_length -= self.doc_lengths.pop(note_id)
+        for term in set(self.tokenize(text)):
+            docs = self.postings[term]
+            del docs[note_id]
+            if not docs:
+                del self.postings[term]
+                del self.terms[bisect_left(self.terms, term)]
+
+    def expand(self, term: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [term] if term in self.postings else []
+        start = bisect_left(self.terms, term)
+        matches = []
+        for candidate in self.terms[start:start + self.max_prefix_terms]:
+            if not candidate.startswith(term):
+                break
+            matches.append(candidate)
+        return matches
+
+    def search(self, query: str, limit: int, prefix: bool = True) -> List[tuple]:
+        """
+        Returns up to `limit` (score, note_id) pairs, best first.
+        With prefix=True every query word also matches longer words ("note" -> "notes").
+        """
+        doc_count = len(self.doc_lengths)
+        if not doc_count:
+            return []
+        # norm = k1 * (1 - b + b * doc_length / avg_length), split into two constants
+        base_norm = self.k1 * (1 - self.b)
+        length_norm = self.k1 * self.b * doc_count / self.total_length if self.total_length else 0.0
+        doc_lengths = self.doc_lengths
+        scores: Dict[int, float] = {}
+        for word in set(self.tokenize(query)):
+            for term in self.expand(word, prefix):
+                docs = self.postings[term]
+                weight = math.log(1 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5)) * (self.k1 + 1)
+                for note_id, freq in docs.items():
+                    norm = base_norm + length_norm * doc_lengths[note_id]
+                    scores[note_id] = scores.get(note_id, 0.0) + weight * freq / (freq + norm)
+        return heapq.nlargest(limit, ((score, note_id) for note_id, score in scores.items()))
+
+
+# Cache of serialized GET /notes/ pages
+class PageCache:
+    """
+    LRU cache of encoded note pages keyed by (limit, offset, cursor).
+    Each entry remembers which note IDs it covers, so a write only drops
+    the pages it can actually change.
+    - Endpoints run in the threadpool, so every access holds `lock`
+    - `generation` counts writes; a page rendered before the latest write
+      may already be stale, so put() refuses it instead of caching it
+    """
+    max_entries = 256
+
+    def __init__(self):
+        # key -> (body, etag, first_id, last_id, is_last_page)
+        self.entries: "OrderedDict[tuple, Tuple[bytes, str, Optional[int], Optional[int], bool]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, key: tuple):
+        """
+        Returns (entry or None, generation); pass the generation to put().
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry, self.generation
+
+    def put(self, key: tuple, body: bytes, page: List[int], is_last_page: bool, generation: int):
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        entry = (body, etag, page[0] if page else None, page[-1] if page else None, is_last_page)
+        with self.lock:
+            if generation == self.generation:
+                self.entries[key] = entry
+                if len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return entry
+
+    def drop(self, should_drop):
+        # Called after the notes have changed
+        with self.lock:
+            self.generation += 1
+            for key in [key for key, entry in self.entries.items() if should_drop(key, entry)]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def note_added(self):
+        # The new note has the largest ID, so only last pages can gain it
+        self.drop(lambda key, entry: entry[4])
+
+    def note_updated(self, note_id: int):
+        self.drop(lambda key, entry: entry[2] is not None and entry[2] <= note_id <= entry[3])
+
+    def note_deleted(self, note_id: int):
+        # Pages holding the note change, and so do offset pages after it (they shift)
+        self.drop(lambda key, entry: entry[2] is not None and (
+            entry[2] <= note_id <= entry[3] or (key[1] > 0 and entry[2] > note_id)
+        ))
+
+
+page_cache = PageCache()
+
+
+def encode_json(content) -> bytes:
+    # Same settings as FastAPI's JSONResponse
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    return etag in request.headers.get("if-none-match", "")
+
+
+search_index = NoteSearchIndex()
+for _note_id, _text in notes_db.items():
+    search_index.add(_note_id, _text)
+
 # Note model
 class Note(BaseModel):
     text: str
@@ -28,34 +211,101 @@ def home():
 # Add new note
 @app.post("/notes/", response_model=Note)
 def add_note(note: Note):
-    new_id = max(notes_db.keys()) + 1 if notes_db else 1
-    notes_db[new_id] = note.text
+    global next_note_id
+    with notes_lock:
+        new_id = next_note_id
+        next_note_id += 1
+        notes_db[new_id] = note.text
+        note_ids.append(new_id)  # Newest ID is always the largest
+        search_index.add(new_id, note.text)
+        note_versions[new_id] = 1
+    page_cache.note_added()
     return {"text": note.text}
 
-# Get all notes
+# Get all notes, one page at a time
+# Pass the X-Next-Cursor header back as ?cursor= to get the next page
+# Pages are cached already encoded; send If-None-Match to get a 304
 @app.get("/notes/")
-def get_all_notes():
-    return notes_db
+def get_all_notes(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[int] = Query(None, description="Last note ID of the previous page"),
+):
+    key = (limit, offset, cursor)
+    entry, generation = page_cache.get(key)
+    if entry is None:
+        with notes_lock:
+            start = bisect_right(note_ids, cursor) if cursor is not None else 0
+            page = note_ids[start + offset:start + offset + limit]
+            content = {note_id: notes_db[note_id] for note_id in page}
+            is_last_page = start + offset + limit >= len(note_ids)
+        entry = page_cache.put(key, encode_json(content), page, is_last_page, generation)
+    body, etag, _, last_id, is_last_page = entry
 
-# Get single note
+    headers = {"ETag": etag}
+    if not is_last_page:
+        headers["X-Next-Cursor"] = str(last_id)
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Search notes by text (BM25 ranking, prefix matching)
+@app.get("/notes/search")
+def search_notes(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=100),
+    prefix: bool = True,
+):
+    with notes_lock:
+        results = search_index.search(q, limit, prefix)
+        return [{"id": note_id, "text": notes_db[note_id], "score": round(score, 4)} for score, note_id in results]
+
+# Get single note (ETag changes whenever the note is updated)
 @app.get("/notes/{note_id}")
-def get_note(note_id: int):
-    if note_id not in notes_db:
+def get_note(note_id: int, request: Request):
+    with notes_lock:  # Version and text from the same moment
+        version = note_versions.get(note_id)
+        text = notes_db.get(note_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Note not found")
-    return {"id": note_id, "text": notes_db[note_id]}
+    etag = f'"{note_id}-{version}"'
+    if not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    cached = note_bodies.get(note_id)
+    if cached is not None and cached[0] == version:
+        body = cached[1]
+    else:
+        body = encode_json({"id": note_id, "text": text})
+        with notes_lock:
+            if note_versions.get(note_id) == version:  # Not updated or deleted meanwhile
+                note_bodies[note_id] = (version, body)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 # Update note
 @app.put("/notes/{note_id}")
 def update_note(note_id: int, note: NoteUpdate):
-    if note_id not in notes_db:
-        raise HTTPException(status_code=404, detail="Note not found")
-    notes_db[note_id] = note.text
+    with notes_lock:
+        if note_id not in notes_db:
+            raise HTTPException(status_code=404, detail="Note not found")
+        search_index.remove(note_id, notes_db[note_id])
+        search_index.add(note_id, note.text)
+        notes_db[note_id] = note.text
+        note_versions[note_id] += 1
+        note_bodies.pop(note_id, None)
+    page_cache.note_updated(note_id)
     return {"message": "Note updated", "id": note_id, "text": note.text}
 
 # Delete note
 @app.delete("/notes/{note_id}")
 def delete_note(note_id: int):
-    if note_id not in notes_db:
-        raise HTTPException(status_code=404, detail="Note not found")
-    deleted_text = notes_db.pop(note_id)
+    with notes_lock:
+        if note_id not in notes_db:
+            raise HTTPException(status_code=404, detail="Note not found")
+        deleted_text = notes_db.pop(note_id)
+        del note_ids[bisect_left(note_ids, note_id)]
+        search_index.remove(note_id, deleted_text)
+        del note_versions[note_id]
+        note_bodies.pop(note_id, None)
+    page_cache.note_deleted(note_id)
     return {"message": "Note deleted", "id": note_id, "deleted_text": deleted_text}
\ No newline at end of file
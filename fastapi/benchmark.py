@@ -0,0 +1,101 @@
+# ⏱️ Notes API benchmarks
+# Run from this folder:  python benchmark.py <search|reads>
+
+import argparse
+import random
+import time
+
+import app as notes_app
+
+WORDS = (
+    "meeting budget travel invoice project design review client launch report "
+    "grocery recipe workout doctor birthday holiday flight hotel contract deadline "
+    "python fastapi database index search cache deploy server bug feature"
+).split()
+
+
+def synthetic_notes(count: int, seed: int = 7) -> dict:
+    """
+    Notes of 5-30 words drawn from a skewed vocabulary: a few common words
+    plus thousands of rarer ones, roughly like real text.
+    """
+    rng = random.Random(seed)
+    vocabulary = WORDS + [f"{word}{n}" for word in WORDS for n in range(200)]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    return {
+        note_id: " ".join(rng.choices(vocabulary, weights, k=rng.randint(5, 30))) + f" ref{note_id}"
+        for note_id in range(1, count + 1)
+    }
+
+
+def time_call(fn, repeat: int) -> float:
+    """
+    Returns the mean wall time of fn() in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def bench_search(args):
+    """
+    Builds the inverted index over synthetic notes, then compares ranked
+    index queries with the client-side alternative: scanning every note.
+    """
+    notes = synthetic_notes(args.notes)
+    index = notes_app.NoteSearchIndex()
+    start = time.perf_counter()
+    for note_id, text in notes.items():
+        index.add(note_id, text)
+    print(f"indexed {len(notes):,} notes in {time.perf_counter() - start:.2f}s ({len(index.terms):,} terms)")
+
+    queries = [("meeting budget", False), ("invoice deadline", False), ("clie", True), ("ref4242", False), ("deploy12 sea", True)]
+    print(f"{'query':>18} {'index µs':>10} {'scan µs':>10}")
+    for query, prefix in queries:
+        indexed = time_call(lambda: index.search(query, 10, prefix), args.repeat)
+        words = query.split()
+        scanned = time_call(lambda: [i for i, text in notes.items() if all(w in text for w in words)], max(1, args.repeat // 10))
+        print(f"{query!r:>18} {indexed:>10.0f} {scanned:>10.0f}")
+
+
+def bench_reads(args):
+    """
+    GET /notes/ latency through the full HTTP stack: encoding the page on
+    every hit, serving the cached encoded page, and answering 304.
+    """
+    from fastapi.testclient import TestClient
+
+    client = TestClient(notes_app.app)
+    notes_app.notes_db.clear()
+    notes_app.notes_db.update(synthetic_notes(args.notes))
+    notes_app.note_ids[:] = sorted(notes_app.notes_db)
+    params = {"limit": 1000}
+
+    def uncached():
+        notes_app.page_cache.clear()
+        return client.get("/notes/", params=params)
+
+    etag = client.get("/notes/", params=params).headers["etag"]
+    runs = {
+        "encode every time": uncached,
+        "cached page": lambda: client.get("/notes/", params=params),
+        "304 not modified": lambda: client.get("/notes/", params=params, headers={"If-None-Match": etag}),
+    }
+    for name, fn in runs.items():
+        print(f"{name:>18}: {time_call(fn, args.repeat):>8.0f} µs")
+
+
+BENCHMARKS = {
+    "search": bench_search,
+    "reads": bench_reads,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Notes API benchmarks")
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    BENCHMARKS[args.name](args)
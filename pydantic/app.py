@@ -1,50 +1,15 @@
-import chainlit as cl
-from pydantic import BaseModel, EmailStr, Field, validator, ValidationError
-from typing import Optional
-from datetime import datetime
-
-# Pydantic models
-class Address(BaseModel):
-    street: str = Field(..., min_length=3, description="Street name (min 3 chars)")
-    city: str = Field(..., min_length=2, description="City name")
-    zip_code: str = Field(..., pattern=r'^\d{5}$', description="5-digit ZIP code")
-
-class UserInfo(BaseModel):
-    name: str = Field(..., min_length=2, max_length=50)
-    email: EmailStr
-    age: int = Field(..., ge=13, le=120)
-    address: Address
-
-    @validator('name')
-    def name_valid(cls, v):
-        if not v.replace(" ", "").isalpha():
-            raise ValueError("Name should only contain letters")
-        return v.title()
-
-# Field-wise models for validation
-class NameOnly(BaseModel):
-    name: str
-
-    @validator('name')
-    def name_valid(cls, v):
-        if not v.replace(" ", "").isalpha():
-            raise ValueError("Name should only contain letters")
-        return v.title()
-
-class EmailOnly(BaseModel):
-    email: EmailStr
+import os
 
-class AgeOnly(BaseModel):
-    age: int = Field(..., ge=13, le=120)
-
-class StreetOnly(BaseModel):
-    street: str = Field(..., min_length=3)
+import chainlit as cl
+from pydantic import ValidationError
 
-class CityOnly(BaseModel):
-    city: str = Field(..., min_length=2)
+from session_store import FormState, create_session_store
+from user_schema import (
+    FIELD_VALIDATORS, UserInfo, get_answer, parse_multi_field, store_answer, validate_answer, validate_fields
+)
 
-class ZipOnly(BaseModel):
-    zip_code: str = Field(..., pattern=r'^\d{5}$')
+# Form progress lives outside the process (see session_store.py)
+sessions = create_session_store(os.environ.get("FORM_SESSION_STORE", "memory"))
 
 
 # Question list
@@ -57,22 +22,53 @@ QUESTIONS = [
     {"field": "zip_code", "prompt": "📮 5-digit ZIP code:"}
 ]
 
+def session_key() -> str:
+    """
+    Logged-in users keep their form across reconnects and restarts;
+    anonymous ones are tracked per chat session.
+    """
+    user = cl.user_session.get("user")
+    return user.identifier if user else cl.user_session.get("id")
+
+
+def next_step(state: FormState) -> int:
+    """
+    First question without an answer (answers may arrive out of order
+    when several are sent in one message).
+    """
+    for step, question in enumerate(QUESTIONS):
+        if get_answer(state.data, FIELD_VALIDATORS[question["field"]].path) is None:
+            return step
+    return len(QUESTIONS)
+
+
+async def save_state(state: FormState):
+    await cl.make_async(sessions.put)(session_key(), state)
+
 # Start of chat
 @cl.on_chat_start
 async def start():
-    await cl.Message(content="🤖 Assalamu Alaikum! Let's begin.").send()
-    cl.user_session.set("data", {})
-    cl.user_session.set("step", 0)
-    await ask_question()
+    state = await cl.make_async(sessions.get)(session_key())
+    if state is not None and not state.complete and state.step > 0:
+        await cl.Message(content="🤖 Welcome back! Let's continue where you left off.").send()
+        await ask_question(state)
+        return
+    await cl.Message(content=(
+        "🤖 Assalamu Alaikum! Let's begin.\n\n"
+        "Tip: you can send everything in one message, e.g.\n"
+        "name: Ali Khan\nemail: ali@example.com\nage: 30\nstreet: 123 Main St\ncity: Karachi\nzip: 12345"
+    )).send()
+    state = FormState()
+    await save_state(state)
+    await ask_question(state)
 
 # Ask next question
-async def ask_question(error=None):
-    step = cl.user_session.get("step", 0)
-    if step >= len(QUESTIONS):
-        await complete_form()
+async def ask_question(state: FormState, error=None):
+    if state.step >= len(QUESTIONS):
+        await complete_form(state)
         return
 
-    question = QUESTIONS[step]
+    question = QUESTIONS[state.step]
     prompt = question["prompt"]
 
     if error:
@@ -81,58 +77,44 @@ async def ask_question(error=None):
     await cl.Message(content=prompt).send()
 
 # Handle answers
-async def process_answer(answer: str):
-    step = cl.user_session.get("step", 0)
-    field = QUESTIONS[step]["field"]
-    data = cl.user_session.get("data", {})
-    address = data.get("address", {})
-
-    try:
-        processed = answer.strip()
-
-        # Individual field validation
-        if field == "name":
-            validated = NameOnly(name=processed)
-            processed = validated.name
-            data[field] = processed
-
-        elif field == "email":
-            validated = EmailOnly(email=processed)
-            data[field] = validated.email
-
-        elif field == "age":
-            validated = AgeOnly(age=int(processed))
-            data[field] = validated.age
-
-        elif field == "street":
-            validated = StreetOnly(street=processed)
-            address["street"] = validated.street
-            data["address"] = address
+async def process_answer(state: FormState, answer: str):
+    fields = parse_multi_field(answer)
+    if fields is not None:
+        await process_multi_field(state, fields)
+        return
 
-        elif field == "city":
-            validated = CityOnly(city=processed)
-            address["city"] = validated.city
-            data["address"] = address
+    field = QUESTIONS[state.step]["field"]
 
-        elif field == "zip_code":
-            validated = ZipOnly(zip_code=processed)
-            address["zip_code"] = validated.zip_code
-            data["address"] = address
+    try:
+        path, value = validate_answer(field, answer)
 
         # Save and go to next question
-        cl.user_session.set("data", data)
-        cl.user_session.set("step", step + 1)
-        await ask_question()
+        store_answer(state.data, path, value)
+        state.step = next_step(state)
+        await save_state(state)
+        await ask_question(state)
 
     except ValidationError as e:
         msg = e.errors()[0]['msg']
-        await ask_question(msg)
+        await ask_question(state, msg)
+
+# Several fields in one message: validate all, re-ask only what failed
+async def process_multi_field(state: FormState, fields: dict):
+    valid, errors = validate_fields(fields)
+    for field, validator in FIELD_VALIDATORS.items():
+        value = get_answer(valid, validator.path)
+        if value is not None:
+            store_answer(state.data, validator.path, value)
+    state.step = next_step(state)
+    await save_state(state)
+
+    error = "\n".join(f"{field}: {msg}" for field, msg in errors.items()) or None
+    await ask_question(state, error)
 
 # Final check
-async def complete_form():
-    data = cl.user_session.get("data", {})
+async def complete_form(state: FormState):
     try:
-        user = UserInfo(**data)
+        user = UserInfo(**state.data)
         summary = f"""
 ✅ **Validation Successful!**
 
@@ -145,23 +127,28 @@ async def complete_form():
 """
         await cl.Message(content=summary).send()
         await cl.Message(content="🔄 Do you want to start over? (yes/no)").send()
-        cl.user_session.set("complete", True)
+        state.complete = True
+        await save_state(state)
     except ValidationError as e:
         await cl.Message(content=f"❌ Final Validation failed: {e}").send()
+        await cl.make_async(sessions.delete)(session_key())
         await start()
 
 # Restart option
 @cl.on_message
 async def main(message: cl.Message):
-    if cl.user_session.get("complete"):
+    state = await cl.make_async(sessions.get)(session_key())
+    if state is None:  # Expired (or never started): begin again
+        await start()
+        return
+    if state.complete:
         await handle_complete(message)
         return
-    await process_answer(message.content)
+    await process_answer(state, message.content)
 
 async def handle_complete(message: cl.Message):
     if message.content.lower() == "yes":
-        cl.user_session.clear()
+        await cl.make_async(sessions.delete)(session_key())
         await start()
     else:
         await cl.Message(content="🤖 Shukriya! Allah Hafiz!").send()
-
@@ -0,0 +1,237 @@
+# ⏱️ Chatbot validation benchmarks
+# Run from this folder:  python benchmark.py <validation|sessions|records|multi-field>
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+from pydantic import BaseModel, EmailStr, Field, ValidationError, validator
+
+import session_store
+import user_schema
+import validate_records
+
+# One answer per question, valid and invalid
+ANSWERS = [
+    ("name", "ali khan"), ("name", "R2D2"),
+    ("email", "ali@example.com"), ("email", "not-an-email"),
+    ("age", "30"), ("age", "7"),
+    ("street", "123 Main St"), ("street", "x"),
+    ("city", "Karachi"), ("city", "K"),
+    ("zip_code", "12345"), ("zip_code", "1234"),
+]
+
+
+def time_call(fn, repeat: int) -> float:
+    """
+    Returns the mean wall time of fn() in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def legacy_validator():
+    """
+    The old process_answer: an if/elif chain building a one-field model
+    (with v1-style @validator) for every message.
+    """
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+    class NameOnly(BaseModel):
+        name: str
+
+        @validator('name')
+        def name_valid(cls, v):
+            if not v.replace(" ", "").isalpha():
+                raise ValueError("Name should only contain letters")
+            return v.title()
+
+    class EmailOnly(BaseModel):
+        email: EmailStr
+
+    class AgeOnly(BaseModel):
+        age: int = Field(..., ge=13, le=120)
+
+    class StreetOnly(BaseModel):
+        street: str = Field(..., min_length=3)
+
+    class CityOnly(BaseModel):
+        city: str = Field(..., min_length=2)
+
+    class ZipOnly(BaseModel):
+        zip_code: str = Field(..., pattern=r'^\d{5}$')
+
+    def validate(field, answer):
+        processed = answer.strip()
+        if field == "name":
+            return NameOnly(name=processed).name
+        elif field == "email":
+            return EmailOnly(email=processed).email
+        elif field == "age":
+            return AgeOnly(age=int(processed)).age
+        elif field == "street":
+            return StreetOnly(street=processed).street
+        elif field == "city":
+            return CityOnly(city=processed).city
+        elif field == "zip_code":
+            return ZipOnly(zip_code=processed).zip_code
+
+    return validate
+
+
+def bench_validation(args):
+    """
+    Per-message validation cost for each question, old path against the
+    table-driven one in user_schema.
+    """
+    legacy = legacy_validator()
+
+    def run(validate, field, answer):
+        def call():
+            try:
+                validate(field, answer)
+            except ValidationError:
+                pass
+        return call
+
+    print(f"{'field':>9} {'answer':>17} {'before µs':>10} {'after µs':>9}")
+    totals = [0.0, 0.0]
+    for field, answer in ANSWERS:
+        before = time_call(run(legacy, field, answer), args.repeat)
+        after = time_call(run(user_schema.validate_answer, field, answer), args.repeat)
+        totals[0] += before
+        totals[1] += after
+        print(f"{field:>9} {answer!r:>17} {before:>10.2f} {after:>9.2f}")
+    print(f"{'mean':>27} {totals[0] / len(ANSWERS):>10.2f} {totals[1] / len(ANSWERS):>9.2f}")
+
+
+def half_finished_forms(count: int) -> list:
+    """
+    `count` forms stopped at every possible step, round-robin.
+    """
+    answers = [("name", "ali khan"), ("email", "ali@example.com"), ("age", "30"),
+               ("street", "123 Main St"), ("city", "Karachi"), ("zip_code", "12345")]
+    forms = []
+    for n in range(count):
+        state = session_store.FormState(step=n % len(answers))
+        for field, answer in answers[:state.step]:
+            user_schema.store_answer(state.data, *user_schema.validate_answer(field, answer))
+        forms.append(state)
+    return forms
+
+
+def bench_sessions(args):
+    """
+    Memory per half-finished form (compact bytes in MemorySessionStore
+    vs plain dicts, as cl.user_session holds them) and get/put latency
+    for both stores.
+    """
+    import copy
+
+    forms = half_finished_forms(args.sessions)
+
+    tracemalloc.start()
+    as_dicts = {f"session-{n}": copy.deepcopy({"step": s.step, "data": s.data, "complete": s.complete}) for n, s in enumerate(forms)}
+    dict_bytes = tracemalloc.get_traced_memory()[0] / len(forms)
+    tracemalloc.stop()
+    del as_dicts
+
+    memory = session_store.MemorySessionStore(max_sessions=args.sessions)
+    tracemalloc.start()
+    for n, state in enumerate(forms):
+        memory.put(f"session-{n}", state)
+    store_bytes = tracemalloc.get_traced_memory()[0] / len(forms)
+    tracemalloc.stop()
+    print(f"{len(forms):,} half-finished forms: {dict_bytes:.0f} bytes each as dicts, {store_bytes:.0f} in MemorySessionStore")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {"memory": memory, "sqlite": session_store.SQLiteSessionStore(os.path.join(tmp, "sessions.db"))}
+        print(f"{'store':>7} {'put µs':>8} {'get µs':>8}")
+        for name, store in stores.items():
+            ids = [f"session-{n}" for n in range(len(forms))]
+            start = time.perf_counter()
+            for session_id, state in zip(ids, forms):
+                store.put(session_id, state)
+            put = (time.perf_counter() - start) / len(forms) * 1e6
+            start = time.perf_counter()
+            for session_id in ids:
+                store.get(session_id)
+            get = (time.perf_counter() - start) / len(forms) * 1e6
+            print(f"{name:>7} {put:>8.1f} {get:>8.1f}")
+            store.close()
+
+
+def bench_records(args):
+    """
+    validate_records on a synthetic CSV of --rows users (1 in 10 invalid):
+    validate_chunk called inline, then the process pool with 1 worker and
+    with one per CPU.
+    """
+    import csv
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "email", "age", "street", "city", "zip_code"])
+            for n in range(args.rows):
+                zip_code = "1234" if n % 10 == 0 else f"{n % 100_000:05d}"
+                writer.writerow([f"user {chr(97 + n % 26)}", f"user{n}@example.com", 18 + n % 60, f"{n} Main St", "Karachi", zip_code])
+
+        start = time.perf_counter()
+        for chunk in validate_records.chunked(validate_records.read_records(path), 5000):
+            validate_records.validate_chunk(chunk)
+        print(f"{'inline':>10}: {args.rows / (time.perf_counter() - start):>9,.0f} rows/s")
+
+        for workers in sorted({1, os.cpu_count() or 1}):
+            report = validate_records.validate_file(path, os.path.join(tmp, "ok.jsonl"), os.path.join(tmp, "bad.jsonl"), workers)
+            print(f"{f'{workers} worker(s)':>10}: {report['rows_per_second']:>9,.0f} rows/s "
+                  f"({report['valid']:,} valid, {report['invalid']:,} invalid)")
+
+
+def bench_multi_field(args):
+    """
+    One complete form sent as a single message (labelled lines, then
+    JSON) against six one-field answers: validation cost per form and
+    user messages needed.
+    """
+    valid = [("name", "ali khan"), ("email", "ali@example.com"), ("age", "30"),
+             ("street", "123 Main St"), ("city", "Karachi"), ("zip_code", "12345")]
+    lines = "\n".join(f"{field}: {answer}" for field, answer in valid)
+    as_json = json.dumps(dict(valid))
+
+    def one_by_one():
+        for field, answer in valid:
+            user_schema.validate_answer(field, answer)
+
+    def single_message(message):
+        return lambda: user_schema.validate_fields(user_schema.parse_multi_field(message))
+
+    print(f"{'':>16} {'messages':>9} {'µs/form':>8}")
+    print(f"{'one by one':>16} {len(valid):>9} {time_call(one_by_one, args.repeat // 10):>8.1f}")
+    print(f"{'labelled lines':>16} {1:>9} {time_call(single_message(lines), args.repeat // 10):>8.1f}")
+    print(f"{'json':>16} {1:>9} {time_call(single_message(as_json), args.repeat // 10):>8.1f}")
+
+
+BENCHMARKS = {
+    "validation": bench_validation,
+    "sessions": bench_sessions,
+    "records": bench_records,
+    "multi-field": bench_multi_field,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chatbot validation benchmarks")
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=20_000)
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+    BENCHMARKS[args.name](args)
@@ -0,0 +1,183 @@
+"""
+Where half-finished forms live between chat messages.
+
+Chainlit's user_session is per-process memory: a restart loses every
+form and a second worker cannot see them. The stores here are keyed by
+session ID and can be shared:
+- MemorySessionStore: bounded LRU with a TTL, for a single process.
+- SQLiteSessionStore: on disk, survives restarts, shareable between
+  workers on one host.
+
+create_session_store(os.environ["FORM_SESSION_STORE"]) picks one:
+"memory" (default) or "sqlite:///path/to/sessions.db".
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from user_schema import FIELD_VALIDATORS, store_answer
+
+DEFAULT_TTL = 24 * 60 * 60  # Forms untouched for a day are dropped
+
+# Fixed order of answers in the serialized form
+FIELD_PATHS = [validator.path for validator in FIELD_VALIDATORS.values()]
+
+
+@dataclass
+class FormState:
+    step: int = 0
+    data: dict = field(default_factory=dict)
+    complete: bool = False
+
+
+def dump_state(state: FormState) -> bytes:
+    """
+    Compact encoding: a JSON array [step, complete, answer, answer, ...]
+    in FIELD_PATHS order, without keys and with unanswered trailing
+    fields left out. A finished form is about 20 bytes plus its answers
+    (67 bytes for Ali Khan, ali@example.com, 30, 12 Main St, Lahore, 54000).
+    """
+    values = []
+    for path in FIELD_PATHS:
+        value = state.data
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        values.append(value)
+    while values and values[-1] is None:
+        values.pop()
+    return json.dumps([state.step, int(state.complete), *values], separators=(",", ":")).encode()
+
+
+def load_state(raw: bytes) -> FormState:
+    step, complete, *values = json.loads(raw)
+    data = {}
+    for path, value in zip(FIELD_PATHS, values):
+        if value is not None:
+            store_answer(data, path, value)
+    return FormState(step, data, bool(complete))
+
+
+class SessionStore(ABC):
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[FormState]:
+        """
+        Returns the saved state, or None if missing or expired.
+        """
+
+    @abstractmethod
+    def put(self, session_id: str, state: FormState):
+        """
+        Saves the state and restarts its TTL.
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str): ...
+
+    def close(self):
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Holds serialized states (not dicts) in an OrderedDict kept in
+    last-touched order. Since every put restarts the same TTL, the oldest
+    entries are also the first to expire, so expiry and LRU eviction both
+    pop from the front.
+    """
+
+    def __init__(self, max_sessions: int = 100_000, ttl: float = DEFAULT_TTL):
+        super().__init__(ttl)
+        self.max_sessions = max_sessions
+        self.sessions: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (expires, bytes)
+        self.lock = threading.Lock()
+
+    def evict(self, now: float):
+        while self.sessions:
+            session_id, (expires, _) = next(iter(self.sessions.items()))
+            if expires > now and len(self.sessions) <= self.max_sessions:
+                break
+            del self.sessions[session_id]
+
+    def get(self, session_id: str) -> Optional[FormState]:
+        with self.lock:
+            entry = self.sessions.get(session_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.sessions[session_id]
+                return None
+        return load_state(entry[1])
+
+    def put(self, session_id: str, state: FormState):
+        raw = dump_state(state)
+        now = time.monotonic()
+        with self.lock:
+            self.sessions[session_id] = (now + self.ttl, raw)
+            self.sessions.move_to_end(session_id)
+            self.evict(now)
+
+    def delete(self, session_id: str):
+        with self.lock:
+            self.sessions.pop(session_id, None)
+
+
+class SQLiteSessionStore(SessionStore):
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS form_sessions ("
+        "id TEXT PRIMARY KEY, expires REAL NOT NULL, state BLOB NOT NULL) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS form_sessions_expires ON form_sessions (expires)",
+    )
+    SELECT = "SELECT state FROM form_sessions WHERE id = ? AND expires > ?"
+    UPSERT = "INSERT OR REPLACE INTO form_sessions (id, expires, state) VALUES (?, ?, ?)"
+    DELETE = "DELETE FROM form_sessions WHERE id = ?"
+    PURGE = "DELETE FROM form_sessions WHERE expires <= ?"
+    PURGE_EVERY = 1000  # Writes between sweeps of expired rows
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL):
+        super().__init__(ttl)
+        # Wall-clock expiry, so it means the same after a restart or in another process
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in self.SCHEMA:
+            self.conn.execute(statement)
+        self.lock = threading.Lock()
+        self.writes = 0
+
+    def get(self, session_id: str) -> Optional[FormState]:
+        with self.lock:
+            row = self.conn.execute(self.SELECT, (session_id, time.time())).fetchone()
+        return load_state(row[0]) if row else None
+
+    def put(self, session_id: str, state: FormState):
+        raw = dump_state(state)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(self.UPSERT, (session_id, now + self.ttl, raw))
+            self.writes += 1
+            if self.writes % self.PURGE_EVERY == 0:
+                self.conn.execute(self.PURGE, (now,))
+
+    def delete(self, session_id: str):
+        with self.lock:
+            self.conn.execute(self.DELETE, (session_id,))
+
+    def close(self):
+        self.conn.close()
+
+
+def create_session_store(url: str = "memory") -> SessionStore:
+    if url == "memory":
+        return MemorySessionStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteSessionStore(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported session store: {url!r} (use 'memory' or 'sqlite:///path')")
@@ -0,0 +1,165 @@
+"""
+Form schema for the chatbot, kept free of Chainlit so it can be reused
+(and benchmarked) on its own.
+
+Each field's constraints are declared once as an Annotated type. The full
+models are built from those types, and so is FIELD_VALIDATORS: one
+prebuilt TypeAdapter per question, created at import. Checking a chat
+answer is then a dict lookup plus a single validate_python call.
+"""
+
+import json
+import re
+from typing import Annotated, Dict, NamedTuple, Optional, Tuple
+
+from pydantic import AfterValidator, BaseModel, EmailStr, Field, TypeAdapter, ValidationError
+
+
+def letters_only(value: str) -> str:
+    if not value.replace(" ", "").isalpha():
+        raise ValueError("Name should only contain letters")
+    return value.title()
+
+
+Name = Annotated[str, Field(min_length=2, max_length=50), AfterValidator(letters_only)]
+Age = Annotated[int, Field(ge=13, le=120)]
+Street = Annotated[str, Field(min_length=3, description="Street name (min 3 chars)")]
+City = Annotated[str, Field(min_length=2, description="City name")]
+ZipCode = Annotated[str, Field(pattern=r'^\d{5}$', description="5-digit ZIP code")]
+
+
+class Address(BaseModel):
+    street: Street
+    city: City
+    zip_code: ZipCode
+
+
+class UserInfo(BaseModel):
+    name: Name
+    email: EmailStr
+    age: Age
+    address: Address
+
+
+class FieldValidator(NamedTuple):
+    adapter: TypeAdapter
+    path: Tuple[str, ...]  # Where the value goes in the UserInfo data
+
+
+FIELD_VALIDATORS: Dict[str, FieldValidator] = {
+    "name": FieldValidator(TypeAdapter(Name), ("name",)),
+    "email": FieldValidator(TypeAdapter(EmailStr), ("email",)),
+    "age": FieldValidator(TypeAdapter(Age), ("age",)),
+    "street": FieldValidator(TypeAdapter(Street), ("address", "street")),
+    "city": FieldValidator(TypeAdapter(City), ("address", "city")),
+    "zip_code": FieldValidator(TypeAdapter(ZipCode), ("address", "zip_code")),
+}
+
+
+def validate_answer(field: str, answer: str) -> Tuple[Tuple[str, ...], object]:
+    """
+    Validates one chat answer for `field`.
+    Returns (path, value); raises pydantic.ValidationError.
+    """
+    validator = FIELD_VALIDATORS[field]
+    return validator.path, validator.adapter.validate_python(answer.strip())
+
+
+def store_answer(data: dict, path: Tuple[str, ...], value) -> dict:
+    """
+    Puts a validated value at `path` in the nested form data.
+    """
+    target = data
+    for key in path[:-1]:
+        target = target.setdefault(key, {})
+    target[path[-1]] = value
+    return data
+
+
+def get_answer(data: dict, path: Tuple[str, ...]):
+    """
+    The value stored at `path`, or None if that question is unanswered.
+    """
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+# -------------------------------
+# All fields in one message
+# -------------------------------
+# "name: Ali Khan\nemail: ali@example.com\n..." or the same as JSON.
+# Labels are matched loosely: "Full name", "ZIP", "address.city", ...
+
+FIELD_ALIASES = {
+    "name": "name", "full name": "name", "fullname": "name",
+    "email": "email", "e-mail": "email", "email address": "email",
+    "age": "age",
+    "street": "street", "street address": "street", "address.street": "street",
+    "city": "city", "address.city": "city",
+    "zip": "zip_code", "zip code": "zip_code", "zip_code": "zip_code", "zipcode": "zip_code",
+    "postal code": "zip_code", "address.zip_code": "zip_code",
+}
+LABELLED_LINE = re.compile(r"^\s*([A-Za-z][\w .\-]*?)\s*[:=]\s*(.*?)\s*$")
+FIELD_PATH_NAMES = {validator.path: field for field, validator in FIELD_VALIDATORS.items()}
+
+
+def parse_multi_field(message: str) -> Optional[Dict[str, object]]:
+    """
+    Returns {field: raw value} when the message carries at least two
+    known fields (JSON object or "label: value" lines), else None so the
+    message is treated as a plain answer to the current question.
+    """
+    text = message.strip()
+    fields = {}
+    if text.startswith("{"):
+        try:
+            record = json.loads(text)
+        except ValueError:
+            return None
+        if not isinstance(record, dict):
+            return None
+        address = record.pop("address", None)
+        if isinstance(address, dict):
+            record.update(address)
+        for label, value in record.items():
+            field = FIELD_ALIASES.get(str(label).strip().lower())
+            if field is not None:
+                fields[field] = value.strip() if isinstance(value, str) else value
+    else:
+        for line in text.splitlines():
+            match = LABELLED_LINE.match(line)
+            field = match and FIELD_ALIASES.get(match.group(1).lower())
+            if field:
+                fields[field] = match.group(2)
+    return fields if len(fields) >= 2 else None
+
+
+def validate_fields(fields: Dict[str, object]) -> Tuple[dict, Dict[str, str]]:
+    """
+    Validates a whole UserInfo in one call. Returns (data, errors):
+    data holds every field that passed (normalized), errors maps each
+    failing provided field to its message. Fields that were simply not
+    sent appear in neither.
+    """
+    data = {}
+    for field, value in fields.items():
+        store_answer(data, FIELD_VALIDATORS[field].path, value)
+    try:
+        return UserInfo.model_validate(data).model_dump(), {}
+    except ValidationError as e:
+        errors = {}
+        for error in e.errors(include_url=False):
+            field = FIELD_PATH_NAMES.get(tuple(error["loc"]))
+            if field in fields and field not in errors:
+                errors[field] = error["msg"]
+
+    # Only on failure: keep the normalized form of the fields that passed
+    valid = {}
+    for field, value in fields.items():
+        if field not in errors:
+            validator = FIELD_VALIDATORS[field]
+            store_answer(valid, validator.path, validator.adapter.validate_python(value))
+    return valid, errors
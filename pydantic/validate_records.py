@@ -0,0 +1,174 @@
+"""
+Offline validation of user-record dumps against the chatbot's UserInfo
+schema (the same rules, imported from user_schema).
+
+Records are streamed from CSV or JSONL, validated in chunks on a process
+pool, and written to two JSONL files: valid records (normalized, e.g.
+title-cased names) and invalid ones with their error reasons.
+
+    python validate_records.py users.csv --workers 8
+    python validate_records.py users.jsonl --valid-out ok.jsonl --invalid-out bad.jsonl
+
+CSV columns: name, email, age, street, city, zip_code (or address.street,
+...). JSONL records may be flat like that or nested like UserInfo.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+from pydantic import ValidationError
+
+from user_schema import UserInfo
+
+ADDRESS_FIELDS = ("street", "city", "zip_code")
+
+
+class ChunkResult(NamedTuple):
+    valid: str    # JSONL, ready to write
+    invalid: str  # JSONL, ready to write
+    valid_count: int
+    invalid_count: int
+
+
+def read_records(path: str) -> Iterator[Tuple[int, Union[dict, str]]]:
+    """
+    Yields (line number, record) without loading the whole file. JSONL
+    lines are passed on unparsed, so parsing also happens in the workers.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    yield number, line.rstrip("\r\n")
+
+
+def to_user_data(record: dict) -> dict:
+    """
+    Accepts flat (street=...), dotted (address.street=...) or nested
+    (address={...}) address fields. An address that is not an object is
+    left as it is, so validation reports it against "address".
+    """
+    data = dict(record)
+    address = data.get("address")
+    if address is None:
+        address = {}
+    elif isinstance(address, dict):
+        address = dict(address)
+    else:
+        return data
+    for field in ADDRESS_FIELDS:
+        for key in (field, f"address.{field}"):
+            if key in data:
+                address[field] = data.pop(key)
+    data["address"] = address
+    return data
+
+
+def validate_chunk(chunk: List[Tuple[int, Union[dict, str]]]) -> ChunkResult:
+    """
+    Runs in a worker process. Returns the output already serialized, so
+    only two strings travel back to the parent.
+    """
+    valid, invalid = [], []
+    for number, record in chunk:
+        try:
+            if isinstance(record, str):
+                record = json.loads(record)
+            if not isinstance(record, dict):
+                raise ValueError("Record must be a JSON object")
+            user = UserInfo.model_validate(to_user_data(record))
+        except ValidationError as e:
+            errors = [{"loc": ".".join(map(str, error["loc"])), "msg": error["msg"]} for error in e.errors(include_url=False)]
+        except ValueError as e:  # Bad JSON
+            errors = [{"loc": "", "msg": str(e)}]
+        except Exception as e:  # Anything else is still just one bad row
+            errors = [{"loc": "", "msg": f"{type(e).__name__}: {e}"}]
+        else:
+            valid.append(user.model_dump_json())
+            continue
+        invalid.append(json.dumps({"line": number, "record": record, "errors": errors}))
+    return ChunkResult(
+        "".join(line + "\n" for line in valid),
+        "".join(line + "\n" for line in invalid),
+        len(valid),
+        len(invalid)
+    )
+
+
+def chunked(records: Iterable, size: int) -> Iterator[list]:
+    records = iter(records)
+    while chunk := list(islice(records, size)):
+        yield chunk
+
+
+def validate_stream(records: Iterable, workers: int, chunk_size: int) -> Iterator[ChunkResult]:
+    """
+    Validates records on a process pool and yields results in input
+    order. At most 2 chunks per worker are in flight, so memory stays
+    bounded however long the input is (unlike Pool.imap, which reads
+    ahead without limit).
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for chunk in chunked(records, chunk_size):
+            in_flight.append(pool.submit(validate_chunk, chunk))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def validate_file(path: str, valid_out: str, invalid_out: str, workers: int = None, chunk_size: int = 5000) -> dict:
+    """
+    Library entry point. Returns counts, elapsed seconds and rows/s.
+    """
+    workers = workers or os.cpu_count() or 1
+    valid_count = invalid_count = 0
+    start = time.perf_counter()
+    with open(valid_out, "w", encoding="utf-8") as valid_file, open(invalid_out, "w", encoding="utf-8") as invalid_file:
+        for result in validate_stream(read_records(path), workers, chunk_size):
+            valid_file.write(result.valid)
+            invalid_file.write(result.invalid)
+            valid_count += result.valid_count
+            invalid_count += result.invalid_count
+    elapsed = time.perf_counter() - start
+    rows = valid_count + invalid_count
+    return {"rows": rows, "valid": valid_count, "invalid": invalid_count, "seconds": elapsed, "rows_per_second": rows / elapsed if elapsed else 0.0}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Validate a CSV/JSONL dump of user records against UserInfo")
+    parser.add_argument("input", help="records.csv or records.jsonl")
+    parser.add_argument("--valid-out", help="default: <input>.valid.jsonl")
+    parser.add_argument("--invalid-out", help="default: <input>.invalid.jsonl")
+    parser.add_argument("--workers", type=int, default=None, help="default: CPU count")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    stem = os.path.splitext(args.input)[0]
+    report = validate_file(
+        args.input,
+        args.valid_out or f"{stem}.valid.jsonl",
+        args.invalid_out or f"{stem}.invalid.jsonl",
+        args.workers,
+        args.chunk_size
+    )
+    print(f"{report['rows']:,} rows ({report['valid']:,} valid, {report['invalid']:,} invalid) "
+          f"in {report['seconds']:.1f}s: {report['rows_per_second']:,.0f} rows/s", file=sys.stderr)
+    return 1 if report["invalid"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())